@@ -0,0 +1,56 @@
+"""Compara los presets del codificador: imágenes por segundo frente a tamaño de los archivos.
+
+Convierte una carpeta de muestra con cada preset (y con los valores por defecto de Pillow)
+a los formatos indicados, en una carpeta temporal, y muestra una tabla para elegir el preset
+con datos.
+
+Uso:
+    python benchmark.py carpeta_de_muestra --de JPG WEBP --a PNG JPG WEBP
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from converter import FORMATOS_DESTINO, FORMATOS_ORIGEN, PRESETS, Salida, convertir_lote
+
+
+def medir(carpeta_muestra, formatos_origen, formato, preset, trabajadores, recursivo):
+    # Devuelve (imágenes convertidas, segundos, bytes generados) de una pasada
+    temporal = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        reporte = convertir_lote(carpeta_muestra, temporal, formatos_origen, salidas=[Salida(formato, preset=preset)],
+                                 trabajadores=trabajadores, recursivo=recursivo)
+        tamano = sum(os.path.getsize(r.destino) for r in reporte.convertidos)
+        return len(reporte.convertidos), reporte.segundos, tamano
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los presets del codificador (velocidad frente a tamaño)")
+    parser.add_argument("muestra", help="Carpeta con imágenes de muestra")
+    parser.add_argument("--de", dest="formatos_origen", default=FORMATOS_ORIGEN, nargs="+", type=str.upper, choices=FORMATOS_ORIGEN)
+    parser.add_argument("--a", dest="formatos_destino", default=["PNG", "JPG", "WEBP"], nargs="+", type=str.upper, choices=FORMATOS_DESTINO)
+    parser.add_argument("--trabajadores", type=int, default=1,
+                        help="Procesos en paralelo (por defecto 1, para medir el costo del codificador sin ruido)")
+    parser.add_argument("--no-recursivo", dest="recursivo", action="store_false")
+    args = parser.parse_args()
+
+    print(f"{'formato':<8} {'preset':<12} {'imágenes':>8} {'img/s':>8} {'MB':>9} {'vs Pillow':>10}")
+    for formato in args.formatos_destino:
+        base = None
+        for preset in [None, *PRESETS]:
+            imagenes, segundos, tamano = medir(args.muestra, args.formatos_origen, formato, preset, args.trabajadores, args.recursivo)
+            if not imagenes:
+                print(f"{formato:<8} sin imágenes convertidas")
+                break
+            base = base or tamano
+            velocidad = imagenes / segundos if segundos else 0
+            print(f"{formato:<8} {preset or 'pillow':<12} {imagenes:>8} {velocidad:>8.1f} {tamano / 2**20:>9.2f} {tamano / base - 1:>+10.1%}")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
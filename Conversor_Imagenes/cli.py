@@ -0,0 +1,114 @@
+"""Conversión de imágenes desde la línea de comandos, sin interfaz gráfica.
+
+No importa Qt: sirve en servidores sin pantalla y en tareas programadas (cron).
+
+Uso:
+    python cli.py carpeta_origen carpeta_destino --de WEBP --a PNG [--incremental] [--trabajadores 4]
+    python cli.py carpeta_origen carpeta_destino --de JPG --salida png --salida jpg:1200 --salida webp:320x240
+    python cli.py archivo/ convertidas/ --de jpg jpeg png webp --a webp
+"""
+import argparse
+import multiprocessing
+import sys
+
+from converter import FORMATOS_DESTINO, FORMATOS_ORIGEN, PRESETS, UMBRAL_GRANDE_MB, Redimension, Salida, convertir_lote
+
+
+def mostrar_progreso(resultado, hechos, total):
+    if not resultado.ok:
+        print(f"\nError en {resultado.origen}: {resultado.error}", file=sys.stderr)
+    print(f"\r{hechos}/{total if total is not None else '?'} imágenes", end="", file=sys.stderr, flush=True)
+
+
+def caja(texto):
+    # "320x240" -> (320, 240)
+    try:
+        ancho, alto = (int(valor) for valor in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("use el formato ANCHOxALTO, por ejemplo 320x240")
+    return ancho, alto
+
+
+def salida(texto):
+    # "png", "jpg:1200" (lado máximo), "webp:320x240" (miniatura) o "png:x0.5" (escala)
+    formato, _, tamano = texto.partition(":")
+    formato = formato.upper()
+    if formato not in FORMATOS_DESTINO:
+        raise argparse.ArgumentTypeError(f"formato no soportado: {formato}")
+    if not tamano:
+        return Salida(formato)
+    try:
+        if tamano.lower().startswith("x"):
+            return Salida(formato, Redimension(escala=float(tamano[1:])))
+        if "x" in tamano.lower():
+            return Salida(formato, Redimension(miniatura=caja(tamano)))
+        return Salida(formato, Redimension(lado_maximo=int(tamano)))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamaño no válido: {tamano}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte todas las imágenes de una carpeta a otro formato")
+    parser.add_argument("origen", help="Carpeta con las imágenes a convertir")
+    parser.add_argument("destino", help="Carpeta donde se guardan las imágenes convertidas")
+    parser.add_argument("--de", dest="formato_origen", default=["WEBP"], nargs="+", type=str.upper, choices=FORMATOS_ORIGEN,
+                        help="Uno o más formatos de origen")
+    parser.add_argument("--a", dest="formato_destino", default="PNG", type=str.upper, choices=FORMATOS_DESTINO)
+    parser.add_argument("--trabajadores", type=int, default=None, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--no-recursivo", dest="recursivo", action="store_false",
+                        help="Solo la carpeta de origen, sin sus subcarpetas (por defecto se repite la estructura de subcarpetas en el destino)")
+    parser.add_argument("--incremental", action="store_true", help="Omite las imágenes ya convertidas que no cambiaron")
+    parser.add_argument("--verificar-hash", action="store_true",
+                        help="En modo incremental, compara el contenido si cambió la fecha del archivo")
+    tamano = parser.add_mutually_exclusive_group()
+    tamano.add_argument("--lado-maximo", type=int, help="Reduce las imágenes para que su lado más largo no pase de este valor")
+    tamano.add_argument("--miniatura", type=caja, help="Reduce las imágenes para que entren en una caja ANCHOxALTO")
+    tamano.add_argument("--escala", type=float, help="Factor de reducción, por ejemplo 0.5 para la mitad")
+    parser.add_argument("--salida", dest="salidas", type=salida, action="append",
+                        help="Versión a generar, se puede repetir: FORMATO[:TAMAÑO], p. ej. png, jpg:1200, webp:320x240 o png:x0.5. "
+                             "Cada imagen se decodifica una sola vez y cada versión se guarda en su subcarpeta")
+    parser.add_argument("--preset", choices=list(PRESETS),
+                        help="Ajustes del codificador: rapido, equilibrado o compacto (por defecto, los de Pillow). "
+                             "Para comparar: python benchmark.py carpeta_de_muestra")
+    parser.add_argument("--memoria-maxima", type=int, help="Memoria máxima por proceso, en MB; las imágenes que no entran se rechazan")
+    parser.add_argument("--umbral-grande", type=int, default=UMBRAL_GRANDE_MB,
+                        help=f"Las imágenes que decodificadas ocupan más de estos MB se procesan de a una (por defecto {UMBRAL_GRANDE_MB})")
+    parser.add_argument("--silencioso", action="store_true", help="No muestra el progreso")
+    args = parser.parse_args(argv)
+
+    redimension = None
+    if args.lado_maximo is not None or args.miniatura is not None or args.escala is not None:
+        try:
+            redimension = Redimension(args.lado_maximo, args.miniatura, args.escala)
+        except ValueError as e:
+            parser.error(str(e))
+
+    try:
+        reporte = convertir_lote(
+            args.origen, args.destino, args.formato_origen, args.formato_destino,
+            trabajadores=args.trabajadores,
+            al_progresar=None if args.silencioso else mostrar_progreso,
+            incremental=args.incremental,
+            verificar_hash=args.verificar_hash,
+            redimension=redimension,
+            salidas=args.salidas,
+            memoria_maxima_mb=args.memoria_maxima,
+            umbral_grande_mb=args.umbral_grande,
+            recursivo=args.recursivo,
+            preset=args.preset,
+        )
+    except OSError as e:
+        print(f"No se pudo leer la carpeta de origen: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("\nConversión interrumpida", file=sys.stderr)
+        return 130
+    if not args.silencioso and reporte.resultados:
+        print(file=sys.stderr)
+    print(reporte.resumen())
+    return 1 if reporte.errores else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
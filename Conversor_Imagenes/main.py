@@ -1,19 +1,136 @@
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QComboBox, QWidget, QFileDialog, QMessageBox, QHBoxLayout
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QComboBox, QWidget, QFileDialog, QMessageBox, QHBoxLayout, QProgressBar, QCheckBox
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+import multiprocessing
+import os
 import sys
-from converter import convertir_imagenes
+import time
+from converter import FORMATOS_DESTINO, FORMATOS_ORIGEN, Salida, convertir_lote
 
 # Variables globales para las carpetas y los formatos de imagen
 carpeta_origen = ""
 carpeta_destino = ""
 formato_origen = "WEBP"  # Formato de imagen por defecto
 formato_destino = "PNG"  # Formato de imagen por defecto
+preset = None  # Ajustes del codificador (None: los de Pillow)
+
+# Presets del codificador como se muestran en la ventana
+OPCIONES_PRESET = [("Predeterminado", None), ("Rápido", "rapido"), ("Equilibrado", "equilibrado"), ("Archivo más pequeño", "compacto")]
+
+# Conversión en curso (solo una a la vez) y hora en que empezó
+trabajo_actual = None
+inicio_conversion = 0.0
+
+
+class SenalesConversion(QObject):
+    # Las señales llegan al hilo de la interfaz; el hilo de trabajo nunca toca los widgets
+    progreso = Signal(int, int)
+    terminado = Signal(object)
+    error = Signal(str)
+
+
+class TrabajoConversion(QRunnable):
+    def __init__(self, carpeta_origen, carpeta_destino, formato_origen, formato_destino, **opciones):
+        super().__init__()
+        self.argumentos = (carpeta_origen, carpeta_destino, formato_origen, formato_destino)
+        self.opciones = opciones  # Se pasan tal cual a convertir_lote
+        self.senales = SenalesConversion()
+        self.cancelar = False
+
+    def run(self):
+        try:
+            reporte = convertir_lote(
+                *self.argumentos,
+                # total es None mientras se recorre la carpeta; se envía 0
+                al_progresar=lambda resultado, hechos, total: self.senales.progreso.emit(hechos, total or 0),
+                cancelado=lambda: self.cancelar,
+                **self.opciones,
+            )
+            self.senales.terminado.emit(reporte)
+        except Exception as e:
+            self.senales.error.emit(str(e))
+
+
+def formatear_tiempo(segundos):
+    minutos, segundos = divmod(int(segundos), 60)
+    return f"{minutos}:{segundos:02d}"
+
 
 def ejecutar_conversion():
-    try:
-        convertir_imagenes(carpeta_origen, carpeta_destino, formato_origen, formato_destino)
-    except Exception as e:
-        QMessageBox.critical(None, "Error", f"Ocurrió un error: {e}")
+    global trabajo_actual, inicio_conversion
+    # Asegurarse de que las carpetas estén definidas
+    if not carpeta_origen or not carpeta_destino:
+        QMessageBox.critical(None, "Error", "Las carpetas de origen o destino no están definidas.")
+        return
+
+    # Con versiones adicionales cada imagen se decodifica una vez y cada formato va a su subcarpeta
+    adicionales = [formato for formato, check in checks_adicionales.items() if check.isChecked() and formato != formato_destino]
+    salidas = [Salida(formato) for formato in [formato_destino] + adicionales] if adicionales else None
+
+    trabajo_actual = TrabajoConversion(carpeta_origen, carpeta_destino, formato_origen, formato_destino,
+                                       incremental=check_incremental.isChecked(), salidas=salidas,
+                                       recursivo=check_recursivo.isChecked(), preset=preset)
+    # En cola: las funciones se ejecutan en el hilo de la interfaz aunque la señal se emita en otro
+    trabajo_actual.senales.progreso.connect(actualizar_progreso, Qt.QueuedConnection)
+    trabajo_actual.senales.terminado.connect(conversion_terminada, Qt.QueuedConnection)
+    trabajo_actual.senales.error.connect(conversion_fallida, Qt.QueuedConnection)
+
+    inicio_conversion = time.monotonic()
+    barra_progreso.setValue(0)
+    etiqueta_progreso.setText("Buscando imágenes...")
+    boton_conversion.setEnabled(False)
+    boton_cancelar.setEnabled(True)
+    QThreadPool.globalInstance().start(trabajo_actual)
+
+
+def cancelar_conversion():
+    # Se detiene entre archivos: los que se están convirtiendo terminan
+    if trabajo_actual:
+        trabajo_actual.cancelar = True
+        boton_cancelar.setEnabled(False)
+        etiqueta_progreso.setText("Cancelando...")
+
+
+def actualizar_progreso(hechos, total):
+    transcurrido = time.monotonic() - inicio_conversion
+    velocidad = hechos / transcurrido if transcurrido > 0 else 0
+    if not total:
+        # Todavía se están buscando imágenes: barra en movimiento sin porcentaje
+        barra_progreso.setMaximum(0)
+        etiqueta_progreso.setText(f"{hechos} imágenes - {velocidad:.1f} imágenes/s - buscando más imágenes...")
+        return
+    barra_progreso.setMaximum(total)
+    barra_progreso.setValue(hechos)
+    restante = (total - hechos) / velocidad if velocidad else 0
+    etiqueta_progreso.setText(f"{hechos}/{total} imágenes - {velocidad:.1f} imágenes/s - restante {formatear_tiempo(restante)}")
+
+
+def fin_conversion():
+    global trabajo_actual
+    trabajo_actual = None
+    boton_conversion.setEnabled(True)
+    boton_cancelar.setEnabled(False)
+
+
+def conversion_terminada(reporte):
+    fin_conversion()
+    etiqueta_progreso.setText(reporte.resumen())
+
+    if reporte.cancelado:
+        QMessageBox.information(None, "Cancelado", f"Conversión cancelada: se procesaron {len(reporte.resultados)} imágenes.")
+    elif not reporte.resultados:
+        QMessageBox.information(None, "Sin Imágenes", f"No se encontraron imágenes con el formato {formato_origen if isinstance(formato_origen, str) else ', '.join(formato_origen)} para convertir.")
+    elif reporte.errores:
+        detalle = "\n".join(f"{os.path.basename(r.origen)}: {r.error}" for r in reporte.errores[:10])
+        QMessageBox.warning(None, "Conversión con errores",
+                            f"Se convirtieron {len(reporte.resultados) - len(reporte.errores)} de {len(reporte.resultados)} imágenes.\n\n{detalle}")
+    else:
+        QMessageBox.information(None, "Éxito", "La conversión de imágenes se completó correctamente.")
+
+
+def conversion_fallida(mensaje):
+    fin_conversion()
+    etiqueta_progreso.setText("")
+    QMessageBox.critical(None, "Error", f"Ocurrió un error: {mensaje}")
 
 def seleccionar_carpeta_origen():
     global carpeta_origen
@@ -31,103 +148,148 @@ def seleccionar_carpeta_destino():
 
 def cambiar_formato_origen(index):
     global formato_origen
-    formatos = ["WEBP", "JPG", "PNG", "JPEG", "BMP", "GIF"]
-    formato_origen = formatos[index]
+    # La última opción ("Todos") convierte todos los formatos de origen soportados
+    formato_origen = FORMATOS_ORIGEN[index] if index < len(FORMATOS_ORIGEN) else FORMATOS_ORIGEN
+
+def cambiar_preset(index):
+    global preset
+    preset = OPCIONES_PRESET[index][1]
 
 def cambiar_formato_destino(index):
     global formato_destino
-    formatos = ["PNG", "JPG", "JPEG", "BMP", "GIF"]
-    formato_destino = formatos[index]
-
-# Crear la aplicación
-app = QApplication(sys.argv)
-
-# Crear la ventana principal
-ventana = QMainWindow()
-ventana.setWindowTitle("Conversor de Imágenes")
-
-# Crear el widget central
-widget_central = QWidget()
-ventana.setCentralWidget(widget_central)
-
-# Crear el layout principal
-layout_principal = QVBoxLayout()
-layout_principal.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
-
-# Crear el layout para los campos de entrada y botones de carpetas
-layout_carpetas = QVBoxLayout()
-layout_carpetas.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
-
-# Etiqueta y campo de entrada para la carpeta de origen
-label_origen = QLabel("Carpeta de Origen:")
-entrada_origen = QLabel()
-entrada_origen.setStyleSheet("border: 1px solid gray; padding: 5px;")  # Borde y padding para el campo de entrada
-boton_origen = QPushButton("Seleccionar Carpeta de Origen")
-boton_origen.setFixedSize(300, 50)  # Tamaño del botón
-boton_origen.setStyleSheet("font-size: 18px;")  # Tamaño del texto
-boton_origen.clicked.connect(seleccionar_carpeta_origen)
-
-# Etiqueta y campo de entrada para la carpeta de destino
-label_destino = QLabel("Carpeta de Destino:")
-entrada_destino = QLabel()
-entrada_destino.setStyleSheet("border: 1px solid gray; padding: 5px;")  # Borde y padding para el campo de entrada
-boton_destino = QPushButton("Seleccionar Carpeta de Destino")
-boton_destino.setFixedSize(300, 50)  # Tamaño del botón
-boton_destino.setStyleSheet("font-size: 18px;")  # Tamaño del texto
-boton_destino.clicked.connect(seleccionar_carpeta_destino)
-
-# Añadir widgets al layout de carpetas
-layout_carpetas.addWidget(label_origen)
-layout_carpetas.addWidget(entrada_origen)
-layout_carpetas.addWidget(boton_origen)
-layout_carpetas.addWidget(label_destino)
-layout_carpetas.addWidget(entrada_destino)
-layout_carpetas.addWidget(boton_destino)
-
-# Crear el layout para los selectores de formato y el botón de conversión
-layout_formato_conversion = QVBoxLayout()
-layout_formato_conversion.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
-
-# Crear el combo box para seleccionar el formato de origen
-combo_formato_origen = QComboBox()
-formatos_origen = ["WEBP", "JPG", "PNG", "JPEG", "BMP", "GIF"]
-combo_formato_origen.addItems(formatos_origen)
-combo_formato_origen.currentIndexChanged.connect(cambiar_formato_origen)
-
-# Crear el combo box para seleccionar el formato de destino
-combo_formato_destino = QComboBox()
-formatos_destino = ["PNG", "JPG", "JPEG", "BMP", "GIF"]
-combo_formato_destino.addItems(formatos_destino)
-combo_formato_destino.currentIndexChanged.connect(cambiar_formato_destino)
-
-# Botón para iniciar la conversión
-boton_conversion = QPushButton("Iniciar Conversión")
-boton_conversion.setFixedSize(300, 50)  # Tamaño del botón
-boton_conversion.setStyleSheet("font-size: 18px;")  # Tamaño del texto
-boton_conversion.clicked.connect(ejecutar_conversion)
-
-# Añadir widgets al layout de formato y conversión
-layout_formato_conversion.addWidget(QLabel("Convertir de:"))
-layout_formato_conversion.addWidget(combo_formato_origen)
-layout_formato_conversion.addWidget(QLabel("a:"))
-layout_formato_conversion.addWidget(combo_formato_destino)
-layout_formato_conversion.addWidget(boton_conversion)
-
-# Añadir los layouts de carpetas y formato al layout principal
-layout_principal.addLayout(layout_carpetas)
-layout_principal.addLayout(layout_formato_conversion)
-
-# Configurar el widget central
-widget_central.setLayout(layout_principal)
-
-# Ajustar tamaño de la ventana
-ventana.resize(500, 500)  # Tamaño inicial de la ventana
-
-# Mostrar la ventana
-ventana.show()
-
-# Ejecutar la aplicación
-sys.exit(app.exec())
+    formato_destino = FORMATOS_DESTINO[index]
+
+if __name__ == "__main__":
+    # Necesario para el pool de procesos del conversor en el ejecutable de PyInstaller (Windows)
+    multiprocessing.freeze_support()
+
+    # Crear la aplicación
+    app = QApplication(sys.argv)
+
+    # Crear la ventana principal
+    ventana = QMainWindow()
+    ventana.setWindowTitle("Conversor de Imágenes")
+
+    # Crear el widget central
+    widget_central = QWidget()
+    ventana.setCentralWidget(widget_central)
+
+    # Crear el layout principal
+    layout_principal = QVBoxLayout()
+    layout_principal.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
+
+    # Crear el layout para los campos de entrada y botones de carpetas
+    layout_carpetas = QVBoxLayout()
+    layout_carpetas.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
+
+    # Etiqueta y campo de entrada para la carpeta de origen
+    label_origen = QLabel("Carpeta de Origen:")
+    entrada_origen = QLabel()
+    entrada_origen.setStyleSheet("border: 1px solid gray; padding: 5px;")  # Borde y padding para el campo de entrada
+    boton_origen = QPushButton("Seleccionar Carpeta de Origen")
+    boton_origen.setFixedSize(300, 50)  # Tamaño del botón
+    boton_origen.setStyleSheet("font-size: 18px;")  # Tamaño del texto
+    boton_origen.clicked.connect(seleccionar_carpeta_origen)
+
+    # Etiqueta y campo de entrada para la carpeta de destino
+    label_destino = QLabel("Carpeta de Destino:")
+    entrada_destino = QLabel()
+    entrada_destino.setStyleSheet("border: 1px solid gray; padding: 5px;")  # Borde y padding para el campo de entrada
+    boton_destino = QPushButton("Seleccionar Carpeta de Destino")
+    boton_destino.setFixedSize(300, 50)  # Tamaño del botón
+    boton_destino.setStyleSheet("font-size: 18px;")  # Tamaño del texto
+    boton_destino.clicked.connect(seleccionar_carpeta_destino)
+
+    # Añadir widgets al layout de carpetas
+    layout_carpetas.addWidget(label_origen)
+    layout_carpetas.addWidget(entrada_origen)
+    layout_carpetas.addWidget(boton_origen)
+    layout_carpetas.addWidget(label_destino)
+    layout_carpetas.addWidget(entrada_destino)
+    layout_carpetas.addWidget(boton_destino)
+
+    # Crear el layout para los selectores de formato y el botón de conversión
+    layout_formato_conversion = QVBoxLayout()
+    layout_formato_conversion.setAlignment(Qt.AlignCenter)  # Centrar el contenido del layout
+
+    # Crear el combo box para seleccionar el formato de origen
+    combo_formato_origen = QComboBox()
+    combo_formato_origen.addItems(FORMATOS_ORIGEN + ["Todos"])
+    combo_formato_origen.currentIndexChanged.connect(cambiar_formato_origen)
+
+    # Crear el combo box para seleccionar el formato de destino
+    combo_formato_destino = QComboBox()
+    combo_formato_destino.addItems(FORMATOS_DESTINO)
+    combo_formato_destino.currentIndexChanged.connect(cambiar_formato_destino)
+
+    # Combo box para elegir el preset del codificador (velocidad frente a tamaño del archivo)
+    combo_preset = QComboBox()
+    combo_preset.addItems([nombre for nombre, _ in OPCIONES_PRESET])
+    combo_preset.currentIndexChanged.connect(cambiar_preset)
+
+    # Formatos adicionales a generar en la misma pasada (uno por subcarpeta)
+    layout_adicionales = QHBoxLayout()
+    checks_adicionales = {}
+    for formato in FORMATOS_DESTINO:
+        checks_adicionales[formato] = QCheckBox(formato)
+        layout_adicionales.addWidget(checks_adicionales[formato])
+
+    # Botón para iniciar la conversión
+    boton_conversion = QPushButton("Iniciar Conversión")
+    boton_conversion.setFixedSize(300, 50)  # Tamaño del botón
+    boton_conversion.setStyleSheet("font-size: 18px;")  # Tamaño del texto
+    boton_conversion.clicked.connect(ejecutar_conversion)
+
+    # Opción para convertir solo las imágenes nuevas o modificadas desde la última conversión
+    check_incremental = QCheckBox("Solo imágenes nuevas o modificadas")
+
+    # Opción para incluir las subcarpetas (se repite su estructura en la carpeta destino)
+    check_recursivo = QCheckBox("Incluir subcarpetas")
+    check_recursivo.setChecked(True)
+
+    # Botón para cancelar la conversión en curso
+    boton_cancelar = QPushButton("Cancelar")
+    boton_cancelar.setFixedSize(300, 50)  # Tamaño del botón
+    boton_cancelar.setStyleSheet("font-size: 18px;")  # Tamaño del texto
+    boton_cancelar.setEnabled(False)
+    boton_cancelar.clicked.connect(cancelar_conversion)
+
+    # Barra y texto de progreso (imágenes por segundo y tiempo restante)
+    barra_progreso = QProgressBar()
+    barra_progreso.setValue(0)
+    etiqueta_progreso = QLabel()
+
+    # Añadir widgets al layout de formato y conversión
+    layout_formato_conversion.addWidget(QLabel("Convertir de:"))
+    layout_formato_conversion.addWidget(combo_formato_origen)
+    layout_formato_conversion.addWidget(QLabel("a:"))
+    layout_formato_conversion.addWidget(combo_formato_destino)
+    layout_formato_conversion.addWidget(QLabel("Compresión:"))
+    layout_formato_conversion.addWidget(combo_preset)
+    layout_formato_conversion.addWidget(QLabel("También generar (cada formato en su subcarpeta):"))
+    layout_formato_conversion.addLayout(layout_adicionales)
+    layout_formato_conversion.addWidget(check_incremental)
+    layout_formato_conversion.addWidget(check_recursivo)
+    layout_formato_conversion.addWidget(boton_conversion)
+    layout_formato_conversion.addWidget(boton_cancelar)
+    layout_formato_conversion.addWidget(barra_progreso)
+    layout_formato_conversion.addWidget(etiqueta_progreso)
+
+    # Añadir los layouts de carpetas y formato al layout principal
+    layout_principal.addLayout(layout_carpetas)
+    layout_principal.addLayout(layout_formato_conversion)
+
+    # Configurar el widget central
+    widget_central.setLayout(layout_principal)
+
+    # Ajustar tamaño de la ventana
+    ventana.resize(500, 500)  # Tamaño inicial de la ventana
+
+    # Mostrar la ventana
+    ventana.show()
+
+    # Ejecutar la aplicación
+    sys.exit(app.exec())
 
 
 # CREAR APP
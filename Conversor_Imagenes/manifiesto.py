@@ -0,0 +1,105 @@
+"""Manifiesto de conversiones hechas, para no volver a convertir imágenes que no cambiaron.
+
+Se guarda en la carpeta destino (``.conversiones.jsonl``), un registro JSON por línea y por
+archivo generado: ruta de origen, tamaño, fecha de modificación, hash opcional, ajustes del
+codificador y archivo generado. Cada conversión se agrega al final apenas termina, así que
+un lote interrumpido conserva lo que alcanzó a convertir; al cerrar se reescribe compacto
+con un solo registro por imagen.
+"""
+import hashlib
+import json
+import os
+
+MANIFIESTO = ".conversiones.jsonl"
+
+
+def hash_archivo(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class Manifiesto:
+    def __init__(self, carpeta_destino, verificar_hash=False):
+        self.ruta = os.path.join(carpeta_destino, MANIFIESTO)
+        self.carpeta_destino = carpeta_destino
+        self.verificar_hash = verificar_hash
+        self.entradas = {}
+        if os.path.exists(self.ruta):
+            with open(self.ruta, encoding="utf-8") as f:
+                for linea in f:
+                    if not linea.endswith("\n"):
+                        break  # Línea incompleta por un corte a mitad de escritura
+                    entrada = json.loads(linea)
+                    # El último registro de cada origen y archivo generado manda
+                    self.entradas[(entrada["origen"], entrada["destino"])] = entrada
+        self._archivo = None
+        # Hash de la última imagen calculada: se reutiliza para todas sus salidas
+        self._ultimo_hash = (None, None)
+
+    def _relativo(self, destino):
+        # Archivo generado, relativo a la carpeta destino (con "/" en cualquier sistema)
+        return os.path.relpath(destino, self.carpeta_destino).replace(os.sep, "/")
+
+    def hash_origen(self, ruta_origen, stat):
+        """sha256 de ``ruta_origen``; se calcula una sola vez por versión (tamaño y fecha) de la imagen"""
+        clave = (os.path.abspath(ruta_origen), stat.st_size, stat.st_mtime_ns)
+        if self._ultimo_hash[0] != clave:
+            self._ultimo_hash = (clave, hash_archivo(ruta_origen))
+        return self._ultimo_hash[1]
+
+    def vigente(self, ruta_origen, destino, ajustes, stat=None):
+        """True si ``destino`` ya es la conversión de la versión actual de ``ruta_origen``"""
+        entrada = self.entradas.get((os.path.abspath(ruta_origen), self._relativo(destino)))
+        if entrada is None or entrada["ajustes"] != ajustes:
+            return False
+        if not os.path.exists(destino):
+            return False
+        stat = stat or os.stat(ruta_origen)
+        if entrada["size"] != stat.st_size:
+            return False
+        if entrada["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        # Cambió la fecha: con hash se comprueba si el contenido también cambió
+        if self.verificar_hash and entrada.get("sha256") and entrada["sha256"] == self.hash_origen(ruta_origen, stat):
+            self.registrar(ruta_origen, destino, ajustes, stat, entrada["sha256"])
+            return True
+        return False
+
+    def registrar(self, ruta_origen, destino, ajustes, stat=None, sha256=None):
+        stat = stat or os.stat(ruta_origen)
+        if sha256 is None and self.verificar_hash:
+            sha256 = hash_archivo(ruta_origen)
+        entrada = {
+            "origen": os.path.abspath(ruta_origen),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "ajustes": ajustes,
+            "destino": self._relativo(destino),
+        }
+        self.entradas[(entrada["origen"], entrada["destino"])] = entrada
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+
+    def cerrar(self):
+        # Reescribe el manifiesto con un solo registro por imagen
+        if self._archivo is None:
+            return
+        self._archivo.close()
+        self._archivo = None
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for entrada in self.entradas.values():
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        os.replace(temporal, self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,71 @@
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from .conection import ApisNetPe, DNI_PATH, RUC_PATH
+
+# (numero, resultado, estado) tal como se entrega en las consultas masivas
+BulkResult = Tuple[str, Optional[dict], str]
+
+# Marca el fin del iterable de números (None puede venir en los datos)
+_FIN = object()
+
+
+class AsyncApisNetPe:
+    """Versión asíncrona de ApisNetPe para consultar listas de DNIs o RUCs con concurrencia limitada.
+
+    Las solicitudes se ejecutan sobre la sesión con pool de ``ApisNetPe`` en un grupo de hilos,
+    así se conserva la misma clasificación de estados (422/403/429/401) que el cliente síncrono.
+    """
+
+    def __init__(self, token: str, concurrency: int = 20, **kwargs) -> None:
+        self.concurrency = concurrency
+        # Un hilo y una conexión por cada solicitud simultánea
+        self.client = ApisNetPe(token, pool_size=concurrency, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="apisnetpe")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncApisNetPe":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    async def _consultar(self, path: str, numero: str) -> BulkResult:
+        loop = asyncio.get_running_loop()
+        result, status = await loop.run_in_executor(self._executor, self.client.fetch, path, {"numero": numero})
+        return numero, result, status
+
+    async def _bulk(self, path: str, numeros: Iterable[str]) -> AsyncIterator[BulkResult]:
+        # Se mantienen como máximo `concurrency` consultas en curso; el iterable se consume
+        # a medida que se liberan espacios, sin cargarlo completo en memoria
+        pendientes_numeros = iter(numeros)
+        en_curso = {
+            asyncio.ensure_future(self._consultar(path, str(numero)))
+            for numero in itertools.islice(pendientes_numeros, self.concurrency)
+        }
+        try:
+            while en_curso:
+                terminadas, en_curso = await asyncio.wait(en_curso, return_when=asyncio.FIRST_COMPLETED)
+                for tarea in terminadas:
+                    siguiente = next(pendientes_numeros, _FIN)
+                    if siguiente is not _FIN:
+                        en_curso.add(asyncio.ensure_future(self._consultar(path, str(siguiente))))
+                    yield tarea.result()
+        finally:
+            # Si el consumidor abandona la iteración, no dejamos tareas colgadas
+            for tarea in en_curso:
+                tarea.cancel()
+
+    # Consultas masivas para DNI y RUC
+    def get_people_bulk(self, dnis: Iterable[str]) -> AsyncIterator[BulkResult]:
+        """Consulta varios DNIs y entrega (numero, resultado, estado) en el orden en que terminan"""
+        return self._bulk(DNI_PATH, dnis)
+
+    def get_companies_bulk(self, rucs: Iterable[str]) -> AsyncIterator[BulkResult]:
+        """Consulta varios RUCs y entrega (numero, resultado, estado) en el orden en que terminan"""
+        return self._bulk(RUC_PATH, rucs)
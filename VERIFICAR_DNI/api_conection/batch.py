@@ -0,0 +1,202 @@
+import csv
+import logging
+import os
+from typing import Dict, Iterable, List, Set
+
+import pandas as pd
+
+from .async_conection import AsyncApisNetPe
+from .conection import STATUS_NO_ENCONTRADO, STATUS_OK
+
+# Columnas que se copian de la respuesta de la API a la salida
+CAMPOS = {
+    "dni": ["nombres", "apellidoPaterno", "apellidoMaterno", "digitoVerificador"],
+    "ruc": ["razonSocial", "estado", "condicion", "direccion", "distrito", "provincia", "departamento"],
+}
+
+
+def leer_numeros(entrada: str, columna: str, tipo: str = "dni", sheet_name=0) -> pd.Series:
+    """Lee la columna de DNIs/RUCs de un archivo Excel o CSV y la normaliza como texto"""
+    if entrada.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(entrada, sheet_name=sheet_name, usecols=[columna], dtype={columna: str})
+    else:
+        df = pd.read_csv(entrada, usecols=[columna], dtype={columna: str})
+
+    numeros = df[columna].fillna("").str.strip().str.replace(r"\.0$", "", regex=True)
+    if tipo == "dni":
+        # Agregar ceros iniciales igual que al consultar la API manualmente
+        numeros = numeros.where(numeros == "", numeros.str.zfill(8))
+    return numeros
+
+
+class Checkpoint:
+    """Registro en disco de los números ya procesados (uno por línea, solo se agregan líneas)"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                # Una última línea incompleta (corte a mitad de escritura) no termina en salto de línea
+                self.done = {linea[:-1] for linea in f if linea.endswith("\n")}
+
+    def add(self, numeros: Iterable[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{numero}\n" for numero in numeros)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class CsvWriter:
+    """Agrega filas a un CSV, escribiendo la cabecera solo si el archivo es nuevo"""
+
+    def __init__(self, path: str, columnas: List[str]) -> None:
+        self.path = path
+        self.columnas = columnas
+        self._nuevo = not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def write(self, filas: List[dict]) -> None:
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columnas, extrasaction="ignore")
+            if self._nuevo:
+                writer.writeheader()
+                self._nuevo = False
+            writer.writerows(filas)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def descartar_pendientes(self, done: Set[str]) -> None:
+        # Quita las filas de números que no llegaron al checkpoint (corte entre escribir el lote
+        # y registrarlo): se vuelven a consultar y, si no, quedarían repetidas
+        if self._nuevo:
+            return
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        conservar = df["numero"].isin(done)
+        if conservar.all():
+            return
+        df[conservar].to_csv(self.path + ".tmp", index=False)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class ParquetWriter:
+    """Escribe cada lote como un archivo part-NNNNN.parquet dentro de la carpeta de salida.
+
+    La carpeta completa se puede leer luego con ``pd.read_parquet(carpeta)``.
+    """
+
+    def __init__(self, path: str, columnas: List[str]) -> None:
+        self.path = path
+        self.columnas = columnas
+        os.makedirs(path, exist_ok=True)
+        self._parte = len([n for n in os.listdir(path) if n.endswith(".parquet")])
+
+    def write(self, filas: List[dict]) -> None:
+        df = pd.DataFrame(filas, columns=self.columnas).astype("string")
+        destino = os.path.join(self.path, f"part-{self._parte:05d}.parquet")
+        # Se escribe en un temporal y se renombra para no dejar partes a medias
+        df.to_parquet(destino + ".tmp", index=False)
+        os.replace(destino + ".tmp", destino)
+        self._parte += 1
+
+    def descartar_pendientes(self, done: Set[str]) -> None:
+        # Como en CsvWriter; solo la última parte puede tener números sin checkpoint
+        if not self._parte:
+            return
+        ultima = os.path.join(self.path, f"part-{self._parte - 1:05d}.parquet")
+        df = pd.read_parquet(ultima)
+        conservar = df["numero"].isin(done)
+        if conservar.all():
+            return
+        if not conservar.any():
+            os.remove(ultima)
+            self._parte -= 1
+            return
+        df[conservar].to_parquet(ultima + ".tmp", index=False)
+        os.replace(ultima + ".tmp", ultima)
+
+
+async def run_batch(
+    client: AsyncApisNetPe,
+    entrada: str,
+    columna: str,
+    salida: str,
+    tipo: str = "dni",
+    batch_size: int = 200,
+    sheet_name=0,
+) -> int:
+    """Consulta todos los números de la columna del archivo de entrada (ver ``run_batch_series``)"""
+    numeros = leer_numeros(entrada, columna, tipo, sheet_name)
+    return await run_batch_series(client, numeros, salida, tipo, batch_size)
+
+
+async def run_batch_series(
+    client: AsyncApisNetPe,
+    numeros: pd.Series,
+    salida: str,
+    tipo: str = "dni",
+    batch_size: int = 200,
+) -> int:
+    """Consulta todos los números de la serie y guarda los resultados a medida que llegan.
+
+    Los números ya registrados en ``<salida>.checkpoint`` se omiten, de modo que una ejecución
+    interrumpida continúa donde se quedó. Solo se guardan las respuestas definitivas (encontrado
+    o no encontrado); los errores temporales (429, red, IP bloqueada) quedan pendientes para la
+    siguiente ejecución. Devuelve la cantidad de números guardados.
+    """
+    checkpoint = Checkpoint(salida.rstrip("/\\") + ".checkpoint")
+
+    # Un mismo número puede aparecer en varias filas; se consulta una sola vez
+    filas_por_numero: Dict[str, List[int]] = {}
+    for fila, numero in numeros.items():
+        if numero and numero not in checkpoint.done:
+            filas_por_numero.setdefault(numero, []).append(fila)
+
+    pendientes = len(filas_por_numero)
+    logging.info(f"{len(checkpoint.done)} números ya procesados, {pendientes} pendientes")
+    if not pendientes:
+        return 0
+
+    columnas = ["fila", "numero", "status"] + CAMPOS[tipo]
+    if salida.lower().endswith(".csv"):
+        writer = CsvWriter(salida, columnas)
+    else:
+        writer = ParquetWriter(salida, columnas)
+    writer.descartar_pendientes(checkpoint.done)
+
+    bulk = client.get_people_bulk if tipo == "dni" else client.get_companies_bulk
+    buffer, hechos = [], []
+    procesados = fallidos = 0
+
+    def guardar():
+        # Primero los resultados y después el checkpoint: si se corta entre ambos, la siguiente
+        # ejecución descarta las filas sin checkpoint y repite la consulta de ese lote
+        if hechos:
+            writer.write(buffer)
+            checkpoint.add(hechos)
+            buffer.clear()
+            hechos.clear()
+
+    try:
+        async for numero, result, status in bulk(filas_por_numero):
+            if status not in (STATUS_OK, STATUS_NO_ENCONTRADO):
+                fallidos += 1
+                continue
+            datos = result or {}
+            for fila in filas_por_numero[numero]:
+                buffer.append({
+                    "fila": fila,
+                    "numero": numero,
+                    "status": status,
+                    **{campo: datos.get(campo, "") for campo in CAMPOS[tipo]},
+                })
+            hechos.append(numero)
+            procesados += 1
+            if len(hechos) >= batch_size:
+                guardar()
+                logging.info(f"{procesados}/{pendientes} números consultados")
+    finally:
+        # También ante Ctrl-C o errores: se guarda lo ya recibido
+        guardar()
+        if fallidos:
+            logging.warning(f"{fallidos} números quedaron pendientes por errores temporales; vuelva a ejecutar para reintentarlos")
+    return procesados
@@ -0,0 +1,61 @@
+"""Compara solicitudes por segundo del cliente con sesión (pool keep-alive)
+frente a la versión anterior que usaba ``requests.get`` en cada consulta.
+
+Uso (desde la carpeta VERIFICAR_DNI):
+    python -m api_conection.benchmark --dni 76173899 --n 200 --hilos 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+
+from .conection import ApisNetPe
+
+
+def consulta_sin_pool(base_url: str, token: str, dni: str):
+    # Reproduce el comportamiento anterior: una conexión nueva por solicitud
+    headers = {
+        "Authorization": token,
+        "Referer": "https://apis.net.pe/api-tipo-cambio.html"
+    }
+    return requests.get(f"{base_url}/v2/reniec/dni", headers=headers, params={"numero": dni}, timeout=ApisNetPe.DEFAULT_TIMEOUT)
+
+
+def medir(nombre: str, funcion, n: int, hilos: int) -> float:
+    # Ejecuta n consultas con el número de hilos indicado y devuelve solicitudes/segundo
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        list(executor.map(lambda _: funcion(), range(n)))
+    duracion = time.perf_counter() - inicio
+    rps = n / duracion
+    print(f"{nombre:<12} {n} solicitudes en {duracion:.2f}s -> {rps:.1f} req/s")
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente ApisNetPe con y sin pool de conexiones")
+    parser.add_argument("--dni", default="76173899", help="DNI a consultar en cada solicitud")
+    parser.add_argument("--n", type=int, default=100, help="Número de solicitudes por cliente")
+    parser.add_argument("--hilos", type=int, default=4, help="Solicitudes concurrentes")
+    parser.add_argument("--base-url", default=ApisNetPe.BASE_URL, help="URL base de la API")
+    args = parser.parse_args()
+
+    dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tokens", "tk1.env")
+    load_dotenv(dotenv_path)
+    token = os.getenv("APIS_TOKEN")
+    if not token:
+        raise ValueError("El token de la API no está configurado en las variables de entorno.")
+
+    rps_sin_pool = medir("sin pool", lambda: consulta_sin_pool(args.base_url, token, args.dni), args.n, args.hilos)
+
+    with ApisNetPe(token, pool_size=args.hilos, base_url=args.base_url) as cliente:
+        rps_con_pool = medir("con pool", lambda: cliente.get_person(args.dni), args.n, args.hilos)
+
+    print(f"Mejora: x{rps_con_pool / rps_sin_pool:.2f}")
+
+
+if __name__ == "__main__":
+    main()
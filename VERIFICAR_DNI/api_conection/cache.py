@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from .conection import STATUS_NO_ENCONTRADO, STATUS_OK
+
+
+class ResponseCache:
+    """Caché persistente en SQLite para las respuestas de ApisNetPe.
+
+    Guarda las respuestas correctas durante ``ttl`` segundos y las respuestas 422
+    (número no encontrado) durante ``negative_ttl``. Cuando se superan ``max_entries``
+    se eliminan las entradas usadas hace más tiempo.
+    """
+
+    # Cada cuántas escrituras se revisa el tamaño de la caché
+    EVICTION_CHECK_EVERY = 200
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 30 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_entries: int = 1_000_000,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        # Una sola conexión compartida entre hilos, protegida por el lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                datos TEXT,
+                estado TEXT NOT NULL,
+                expira REAL NOT NULL,
+                usado REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas (usado)")
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> Optional[Tuple[Optional[dict], str]]:
+        """Devuelve (datos, estado) si la clave está vigente en la caché, o None si no está"""
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT datos, estado, expira FROM respuestas WHERE clave = ?", (key,)
+            ).fetchone()
+            if fila is None or fila[2] < ahora:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE respuestas SET usado = ? WHERE clave = ?", (ahora, key))
+            self._conn.commit()
+        datos, estado, _ = fila
+        return (json.loads(datos) if datos is not None else None), estado
+
+    def set(self, key: str, data: Optional[dict], status: str) -> None:
+        """Guarda una respuesta; solo se cachean respuestas correctas y 422 (caché negativa)"""
+        if status == STATUS_OK:
+            ttl = self.ttl
+        elif status == STATUS_NO_ENCONTRADO:
+            ttl = self.negative_ttl
+        else:
+            return
+
+        ahora = time.time()
+        datos = json.dumps(data) if data is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, datos, estado, expira, usado) VALUES (?, ?, ?, ?, ?)",
+                (key, datos, status, ahora + ttl, ahora),
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_CHECK_EVERY == 0:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Elimina entradas vencidas y, si aún se supera el límite, las menos usadas recientemente
+        self._conn.execute("DELETE FROM respuestas WHERE expira < ?", (time.time(),))
+        total = self._conn.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        exceso = total - self.max_entries
+        if exceso > 0:
+            self._conn.execute(
+                "DELETE FROM respuestas WHERE clave IN (SELECT clave FROM respuestas ORDER BY usado LIMIT ?)",
+                (exceso,),
+            )
+
+    def stats(self) -> dict:
+        """Contadores de aciertos y fallos de la caché"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -1,55 +1,245 @@
 import requests
 import logging
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Sequence, Tuple, Union
+from requests.adapters import HTTPAdapter
+
+from .metrics import ClientMetrics
+from .ratelimit import AdaptiveRateLimiter, CircuitBreaker, backoff_delay, parse_retry_after
+from .tokens import NoTokenAvailable, TokenPool
+
+# Estados devueltos junto con cada consulta
+STATUS_OK = "ok"
+STATUS_NO_ENCONTRADO = "no_encontrado"
+STATUS_IP_BLOQUEADA = "ip_bloqueada"
+STATUS_DEMASIADAS_SOLICITUDES = "demasiadas_solicitudes"
+STATUS_TOKEN_INVALIDO = "token_invalido"
+STATUS_ERROR_SERVIDOR = "error_servidor"
+STATUS_ERROR_CONEXION = "error_conexion"
+STATUS_CIRCUITO_ABIERTO = "circuito_abierto"
+
+# Clasificación de los códigos HTTP conocidos: (estado, mensaje de log)
+HTTP_STATUS = {
+    422: (STATUS_NO_ENCONTRADO, "Parámetro inválido - NO SE ENCONTRÓ EL NÚMERO DE DNI SOLICITADO"),
+    403: (STATUS_IP_BLOQUEADA, "IP bloqueada"),
+    429: (STATUS_DEMASIADAS_SOLICITUDES, "Demasiadas solicitudes"),
+    401: (STATUS_TOKEN_INVALIDO, "Token inválido o limitado"),
+}
+
+DNI_PATH = "/v2/reniec/dni"
+RUC_PATH = "/v2/sunat/ruc"
 
 
 class ApisNetPe:
     BASE_URL = "https://api.apis.net.pe"
-    
-    def __init__(self, token: str) -> None:
-        # Inicializa la clase con el token proporcionado
-        self.token = token
 
-    def _get(self, path: str, params: dict):
-        # Función interna para hacer la solicitud GET
-        url = f"{self.BASE_URL}{path}"
+    # Tiempo máximo (segundos) para conectar y para leer la respuesta
+    DEFAULT_TIMEOUT = (3.05, 15)
+
+    def __init__(
+        self,
+        token: Union[str, Sequence[str], TokenPool],
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        base_url: Optional[str] = None,
+        cache=None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = 3,
+        metrics: Optional[ClientMetrics] = None,
+        padron=None,
+    ) -> None:
+        # Inicializa la clase con el token o la lista de tokens proporcionados
+        if isinstance(token, TokenPool):
+            self.tokens = token
+        elif isinstance(token, str):
+            self.tokens = TokenPool([token])
+        else:
+            self.tokens = TokenPool(token)
+        # Caché opcional de respuestas (ver cache.ResponseCache)
+        self.cache = cache
+        # Índice local opcional del padrón de SUNAT (ver padron.PadronIndex) para consultas de RUC
+        self.padron = padron
+        # Control de tasa adaptativo, circuito ante bloqueos de IP y reintentos de errores transitorios
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AdaptiveRateLimiter()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.max_retries = max_retries
+        # Latencias, códigos de estado, reintentos y bytes recibidos por endpoint
+        self.metrics = metrics if metrics is not None else ClientMetrics()
+        # Consultas en curso por clave: las solicitudes idénticas simultáneas esperan a la primera
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+        self.timeout = timeout
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+
+        # Sesión reutilizable: mantiene las conexiones TCP/TLS abiertas (keep-alive)
+        # para no repetir el handshake en cada consulta
+        self.session = requests.Session()
+        self.session.headers.update({"Referer": "https://apis.net.pe/api-tipo-cambio.html"})
+
+        # pool_block=True evita abrir más conexiones que pool_size cuando se usa desde varios hilos
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-        # Encabezados con el token de autenticación
-        headers = {
-            "Authorization": self.token,
-            "Referer": "https://apis.net.pe/api-tipo-cambio.html"
-        }
+    def close(self) -> None:
+        # Cierra las conexiones abiertas del pool
+        self.session.close()
+
+    def __enter__(self) -> "ApisNetPe":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def fetch(self, path: str, params: dict) -> Tuple[Optional[dict], str]:
+        """Realiza la solicitud GET y devuelve (datos, estado) en lugar de solo registrar el error.
+
+        Si ya hay una consulta idéntica en curso (otro hilo con el mismo número), se espera su
+        resultado en lugar de repetir la llamada; todos los que esperan reciben el mismo dict.
+        """
+        key = f"{path}?numero={params.get('numero')}"
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            self.metrics.record_coalesced(path)
+            return future.result()
 
         try:
-            # Hacer la solicitud GET a la API
-            response = requests.get(url, headers=headers, params=params)
-
-            # Verificar el código de estado de la respuesta
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 422:
-                logging.warning(f"{response.url} - Parámetro inválido - NO SE ENCONTRÓ EL NÚMERO DE DNI SOLICITADO")
-            elif response.status_code == 403:
-                logging.warning(f"{response.url} - IP bloqueada")
-            elif response.status_code == 429:
-                logging.warning(f"{response.url} - Demasiadas solicitudes")
-            elif response.status_code == 401:
-                logging.warning(f"{response.url} - Token inválido o limitado")
+            result = self._fetch(path, params, key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    def _fetch(self, path: str, params: dict, key: str) -> Tuple[Optional[dict], str]:
+        if path == RUC_PATH and self.padron is not None:
+            # Los RUC del padrón local se responden sin llamar a la API
+            local = self.padron.lookup(params.get("numero"))
+            if local is not None:
+                return local, STATUS_OK
+
+        if self.cache is None:
+            return self._request(path, params)
+
+        # Consultar primero la caché; solo se llama a la API si no hay una respuesta vigente
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result, status = self._request(path, params)
+        self.cache.set(key, result, status)
+        return result, status
+
+    def _request(self, path: str, params: dict) -> Tuple[Optional[dict], str]:
+        # Solicitud GET a la API sin pasar por la caché. Un 401 cambia de token, un 429 reduce
+        # la tasa y enfría el token, y los errores 5xx o de red se reintentan con espera exponencial.
+        # `trial` indica si esta es la solicitud de prueba que decide si el circuito se cierra
+        trial = self.circuit_breaker.allow()
+        if trial is None:
+            return None, STATUS_CIRCUITO_ABIERTO
+
+        attempt = 0
+        while True:
+            try:
+                token = self.tokens.acquire()
+            except NoTokenAvailable as e:
+                logging.error(str(e))
+                self.circuit_breaker.release_trial(trial)
+                return None, STATUS_TOKEN_INVALIDO
+
+            self.rate_limiter.acquire()
+            result, status, response = self._request_with_token(path, params, token)
+
+            if status == STATUS_IP_BLOQUEADA:
+                self.circuit_breaker.trip()
+                return result, status
+            if response is None:
+                self.circuit_breaker.release_trial(trial)
+            else:
+                self.circuit_breaker.record_success(trial)
+            trial = False
+
+            if status == STATUS_TOKEN_INVALIDO:
+                self.tokens.disable(token)
+                self.metrics.record_retry(path)
+                continue
+
+            if status == STATUS_DEMASIADAS_SOLICITUDES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                # Con varios tokens el Retry-After solo pausa al token afectado, no a todo el cliente
+                varios = len(self.tokens.active) > 1
+                self.rate_limiter.on_throttled(None if varios else retry_after)
+                # Sin Retry-After y con un solo token, la pausa la marca la tasa del limitador:
+                # el enfriamiento por defecto del token detendría a todos los hilos por un minuto
+                if varios or retry_after is not None:
+                    self.tokens.cool_down(token, retry_after)
+            elif status == STATUS_ERROR_CONEXION or (status == STATUS_ERROR_SERVIDOR and response.status_code >= 500):
+                time.sleep(backoff_delay(attempt))
             else:
-                logging.warning(f"{response.url} - Error del servidor status_code={response.status_code}")
+                if status in (STATUS_OK, STATUS_NO_ENCONTRADO):
+                    self.rate_limiter.on_success()
+                return result, status
 
+            if attempt >= self.max_retries:
+                return result, status
+            trial = self.circuit_breaker.allow()
+            if trial is None:
+                return result, status
+            attempt += 1
+            self.metrics.record_retry(path)
+
+    def _request_with_token(self, path: str, params: dict, token: str):
+        # Devuelve (datos, estado, respuesta); respuesta es None si no se pudo conectar
+        url = f"{self.base_url}{path}"
+
+        # Encabezado con el token de autenticación
+        headers = {"Authorization": token}
+
+        inicio = time.perf_counter()
+        try:
+            # Hacer la solicitud GET a la API reutilizando la sesión
+            response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
         except requests.exceptions.RequestException as e:
             # Si hay un error al hacer la solicitud, lo capturamos
+            self.metrics.record_request(path, "error", time.perf_counter() - inicio)
             logging.error(f"Error al realizar la solicitud a {url}: {str(e)}")
+            return None, STATUS_ERROR_CONEXION, None
 
-        # Si algo falla, devolvemos None
-        return None
+        self.metrics.record_request(path, response.status_code, time.perf_counter() - inicio, len(response.content))
+
+        # Verificar el código de estado de la respuesta
+        if response.status_code == 200:
+            return response.json(), STATUS_OK, response
+
+        status, mensaje = HTTP_STATUS.get(
+            response.status_code,
+            (STATUS_ERROR_SERVIDOR, f"Error del servidor status_code={response.status_code}")
+        )
+        logging.warning(f"{response.url} - {mensaje}")
+        return None, status, response
+
+    def _get(self, path: str, params: dict):
+        # Función interna para hacer la solicitud GET; si algo falla devuelve None
+        return self.fetch(path, params)[0]
 
     # Métodos de consulta para DNI y RUC
     def get_person(self, dni: str) -> Optional[dict]:
         """Consulta información de una persona por su DNI"""
-        return self._get("/v2/reniec/dni", {"numero": dni})
+        return self._get(DNI_PATH, {"numero": dni})
 
     def get_company(self, ruc: str) -> Optional[dict]:
         """Consulta información de una empresa por su RUC"""
-        return self._get("/v2/sunat/ruc", {"numero": ruc})
+        return self._get(RUC_PATH, {"numero": ruc})
@@ -0,0 +1,199 @@
+"""Servidor local que imita los endpoints /v2/reniec/dni y /v2/sunat/ruc de apis.net.pe.
+
+Permite medir el cliente sin gastar cuota: la latencia, los errores 429/403/401/422/5xx
+y el límite de solicitudes por segundo son configurables, y cada número devuelve siempre
+la misma persona o empresa sintética.
+
+Uso (desde la carpeta VERIFICAR_DNI):
+    python -m api_conection.fake_server --puerto 8000 --latencia 0.05 --limite 50
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+NOMBRES = ["JUAN", "MARIA", "JOSE", "ROSA", "CARLOS", "ANA", "LUIS", "CARMEN", "JORGE", "ELENA", "PEDRO", "LUCIA"]
+APELLIDOS = ["QUISPE", "FLORES", "SANCHEZ", "RODRIGUEZ", "GARCIA", "ROJAS", "HUAMAN", "MAMANI", "CHAVEZ", "TORRES", "RAMOS", "DIAZ"]
+DEPARTAMENTOS = ["LIMA", "AREQUIPA", "CUSCO", "PIURA", "LA LIBERTAD", "JUNIN"]
+
+
+def _semilla(numero: str) -> random.Random:
+    # Generador determinista a partir del número: el mismo DNI devuelve siempre los mismos datos
+    return random.Random(int(hashlib.sha256(numero.encode()).hexdigest()[:16], 16))
+
+
+def persona_sintetica(dni: str) -> dict:
+    rnd = _semilla(dni)
+    return {
+        "nombres": " ".join(rnd.sample(NOMBRES, rnd.choice([1, 2]))),
+        "apellidoPaterno": rnd.choice(APELLIDOS),
+        "apellidoMaterno": rnd.choice(APELLIDOS),
+        "tipoDocumento": "1",
+        "numeroDocumento": dni,
+        "digitoVerificador": str(rnd.randint(0, 9)),
+    }
+
+
+def empresa_sintetica(ruc: str) -> dict:
+    rnd = _semilla(ruc)
+    departamento = rnd.choice(DEPARTAMENTOS)
+    return {
+        "razonSocial": f"{rnd.choice(APELLIDOS)} {rnd.choice(['S.A.C.', 'E.I.R.L.', 'S.A.'])}",
+        "tipoDocumento": "6",
+        "numeroDocumento": ruc,
+        "estado": rnd.choice(["ACTIVO", "ACTIVO", "ACTIVO", "BAJA DE OFICIO"]),
+        "condicion": rnd.choice(["HABIDO", "HABIDO", "NO HABIDO"]),
+        "direccion": f"AV. {rnd.choice(APELLIDOS)} NRO. {rnd.randint(1, 2000)}",
+        "distrito": departamento,
+        "provincia": departamento,
+        "departamento": departamento,
+    }
+
+
+class FakeApisNetPe:
+    """Servidor de prueba configurable; se usa como context manager o con start()/stop()"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rates: Optional[Dict[int, float]] = None,
+        rate_limit: Optional[float] = None,
+        not_found_rate: float = 0.05,
+        invalid_tokens: Iterable[str] = (),
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        # Probabilidad de responder con cada código de error, p. ej. {429: 0.01, 500: 0.02}
+        self.error_rates = error_rates or {}
+        self.rate_limit = rate_limit
+        self.not_found_rate = not_found_rate
+        self.invalid_tokens = set(invalid_tokens)
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeApisNetPe":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeApisNetPe":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _responder(self, path: str, numero: str, token: str):
+        # Devuelve (código HTTP, cuerpo, cabeceras adicionales)
+        with self._lock:
+            self.requests += 1
+            ahora = time.monotonic()
+            if self.rate_limit is not None:
+                while self._recent and self._recent[0] < ahora - 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    return 429, {"message": "Too Many Requests"}, {"Retry-After": "1"}
+                self._recent.append(ahora)
+            sorteo = self._random.random()
+
+        if token in self.invalid_tokens:
+            return 401, {"message": "Unauthorized"}, {}
+
+        acumulado = 0.0
+        for codigo, probabilidad in self.error_rates.items():
+            acumulado += probabilidad
+            if sorteo < acumulado:
+                cabeceras = {"Retry-After": "1"} if codigo == 429 else {}
+                return codigo, {"message": f"error {codigo}"}, cabeceras
+
+        if path == "/v2/reniec/dni":
+            largo, generar = 8, persona_sintetica
+        elif path == "/v2/sunat/ruc":
+            largo, generar = 11, empresa_sintetica
+        else:
+            return 404, {"message": "Not Found"}, {}
+
+        # Números con formato inválido o "no registrados" (fracción determinista) responden 422
+        if len(numero) != largo or not numero.isdigit() or _semilla(numero).random() < self.not_found_rate:
+            return 422, {"message": "numero invalido"}, {}
+        return 200, generar(numero), {}
+
+    def _handler_class(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                numero = parse_qs(url.query).get("numero", [""])[0]
+                token = self.headers.get("Authorization", "")
+                if servidor.latency or servidor.jitter:
+                    time.sleep(max(0.0, servidor.latency + random.uniform(-servidor.jitter, servidor.jitter)))
+
+                codigo, cuerpo, cabeceras = servidor._responder(url.path, numero, token)
+                datos = json.dumps(cuerpo).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita apis.net.pe")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia media por solicitud (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variación de la latencia (s)")
+    parser.add_argument("--limite", type=float, help="Solicitudes por segundo antes de responder 429")
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--p403", type=float, default=0.0)
+    parser.add_argument("--p401", type=float, default=0.0)
+    parser.add_argument("--p500", type=float, default=0.0)
+    parser.add_argument("--p422", type=float, default=0.05, help="Fracción de números no encontrados")
+    args = parser.parse_args()
+
+    servidor = FakeApisNetPe(
+        port=args.puerto,
+        latency=args.latencia,
+        jitter=args.jitter,
+        error_rates={429: args.p429, 403: args.p403, 401: args.p401, 500: args.p500},
+        rate_limit=args.limite,
+        not_found_rate=args.p422,
+    )
+    print(f"Servidor de prueba en {servidor.base_url} (Ctrl-C para detener)")
+    try:
+        servidor._server.serve_forever()
+    except KeyboardInterrupt:
+        servidor._server.server_close()
@@ -0,0 +1,84 @@
+"""Prueba de carga del cliente contra el servidor local de fake_server.
+
+Ejecuta el mismo lote de consultas con concurrencia creciente y muestra el rendimiento
+(consultas/s) y la latencia p50/p95/p99 de cada nivel, sin gastar cuota real.
+
+Uso (desde la carpeta VERIFICAR_DNI):
+    python -m api_conection.loadtest --n 2000 --niveles 1 2 4 8 16 32 --latencia 0.05 --limite 200
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from .async_conection import AsyncApisNetPe
+from .fake_server import FakeApisNetPe
+from .metrics import ClientMetrics
+from .conection import DNI_PATH
+
+
+async def medir_nivel(base_url: str, concurrencia: int, n: int) -> dict:
+    metrics = ClientMetrics(log_interval=None, keep_samples=True)
+    estados = Counter()
+    dnis = (str(10000000 + i) for i in range(n))
+
+    inicio = time.perf_counter()
+    async with AsyncApisNetPe("token-prueba", concurrency=concurrencia, base_url=base_url, metrics=metrics) as cliente:
+        async for _, _, status in cliente.get_people_bulk(dnis):
+            estados[status] += 1
+    duracion = time.perf_counter() - inicio
+
+    datos = metrics.snapshot().get(DNI_PATH, {})
+    return {
+        "concurrencia": concurrencia,
+        "consultas_s": n / duracion,
+        "p50": datos.get("latency_p50_ms"),
+        "p95": datos.get("latency_p95_ms"),
+        "p99": datos.get("latency_p99_ms"),
+        "reintentos": datos.get("retries", 0),
+        "estados": dict(estados),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de ApisNetPe contra un servidor local")
+    parser.add_argument("--n", type=int, default=1000, help="Consultas por nivel de concurrencia")
+    parser.add_argument("--niveles", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--base-url", help="Usar un servidor ya iniciado en lugar de uno interno")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia media del servidor interno (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--limite", type=float, help="Solicitudes por segundo antes de responder 429")
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--p500", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Los avisos por cada 422/429 ensucian la tabla; se muestran solo errores
+    logging.basicConfig(level=logging.ERROR)
+
+    servidor = None
+    base_url = args.base_url
+    if base_url is None:
+        servidor = FakeApisNetPe(
+            latency=args.latencia,
+            jitter=args.jitter,
+            rate_limit=args.limite,
+            error_rates={429: args.p429, 500: args.p500},
+        ).start()
+        base_url = servidor.base_url
+
+    print(f"{'conc':>5} {'consultas/s':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reint':>6}  estados")
+    try:
+        for concurrencia in args.niveles:
+            r = asyncio.run(medir_nivel(base_url, concurrencia, args.n))
+            print(
+                f"{r['concurrencia']:>5} {r['consultas_s']:>12.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+                f"{r['p99']:>8.1f} {r['reintentos']:>6}  {r['estados']}"
+            )
+    finally:
+        if servidor is not None:
+            servidor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Union
+
+# Límites superiores (ms) de los intervalos del histograma de latencia
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+def _ms(valor: Optional[float]) -> str:
+    return f"{valor:.0f}ms" if valor is not None else "-"
+
+
+class EndpointMetrics:
+    """Contadores de un endpoint: histograma de latencia, códigos de estado, reintentos y bytes"""
+
+    def __init__(self, keep_samples: bool = False) -> None:
+        # Con keep_samples se guardan todas las latencias y los percentiles son exactos
+        self.samples: Optional[List[float]] = [] if keep_samples else None
+        self.requests = 0
+        self.retries = 0
+        # Solicitudes ahorradas al compartir una consulta idéntica que ya estaba en curso
+        self.coalesced = 0
+        self.bytes_received = 0
+        self.latency_total = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+        self.status_codes: Counter = Counter()
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil (ms); sin muestras se aproxima con el límite superior del intervalo donde cae"""
+        if not self.requests:
+            return None
+        if self.samples:
+            ordenadas = sorted(self.samples)
+            return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+        objetivo = q * self.requests
+        acumulado = 0
+        for limite, cantidad in zip(LATENCY_BUCKETS_MS, self.histogram):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return limite
+        return LATENCY_BUCKETS_MS[-1]
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "bytes_received": self.bytes_received,
+            "latency_avg_ms": (self.latency_total / self.requests * 1000) if self.requests else None,
+            "latency_p50_ms": self.percentile(0.50),
+            "latency_p95_ms": self.percentile(0.95),
+            "latency_p99_ms": self.percentile(0.99),
+            "latency_histogram_ms": dict(zip(LATENCY_BUCKETS_MS, self.histogram)),
+            "status_codes": dict(self.status_codes),
+        }
+
+
+class ClientMetrics:
+    """Métricas del cliente ApisNetPe por endpoint (/v2/reniec/dni, /v2/sunat/ruc).
+
+    Se consultan con ``snapshot()`` y, cada ``log_interval`` segundos, se registra un
+    resumen en el log. Con ``log_interval=None`` no se registra nada automáticamente.
+    """
+
+    def __init__(self, log_interval: Optional[float] = 60.0, keep_samples: bool = False) -> None:
+        self.log_interval = log_interval
+        self.keep_samples = keep_samples
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self._last_log = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _endpoint(self, path: str) -> EndpointMetrics:
+        if path not in self.endpoints:
+            self.endpoints[path] = EndpointMetrics(self.keep_samples)
+        return self.endpoints[path]
+
+    def record_request(self, path: str, status_code: Union[int, str], latency: float, bytes_received: int = 0) -> None:
+        """Registra una solicitud; status_code es el código HTTP o "error" si no hubo respuesta"""
+        with self._lock:
+            endpoint = self._endpoint(path)
+            endpoint.requests += 1
+            endpoint.latency_total += latency
+            endpoint.bytes_received += bytes_received
+            endpoint.status_codes[status_code] += 1
+            endpoint.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency * 1000)] += 1
+            if endpoint.samples is not None:
+                endpoint.samples.append(latency)
+        self._maybe_log()
+
+    def record_retry(self, path: str) -> None:
+        with self._lock:
+            self._endpoint(path).retries += 1
+
+    def record_coalesced(self, path: str) -> None:
+        with self._lock:
+            self._endpoint(path).coalesced += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Copia de las métricas actuales por endpoint"""
+        with self._lock:
+            return {path: endpoint.to_dict() for path, endpoint in self.endpoints.items()}
+
+    def summary(self) -> str:
+        """Resumen de una línea con las métricas de cada endpoint"""
+        partes = []
+        for path, datos in self.snapshot().items():
+            codigos = ",".join(f"{codigo}:{n}" for codigo, n in sorted(datos["status_codes"].items(), key=str))
+            partes.append(
+                f"{path} n={datos['requests']} p50={_ms(datos['latency_p50_ms'])} p95={_ms(datos['latency_p95_ms'])} "
+                f"p99={_ms(datos['latency_p99_ms'])} reintentos={datos['retries']} "
+                f"agrupadas={datos['coalesced']} "
+                f"kB={datos['bytes_received'] / 1024:.1f} estados=[{codigos}]"
+            )
+        return " | ".join(partes) or "sin solicitudes"
+
+    def _maybe_log(self) -> None:
+        if self.log_interval is None:
+            return
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._last_log < self.log_interval:
+                return
+            self._last_log = ahora
+        logging.info(f"Métricas ApisNetPe: {self.summary()}")
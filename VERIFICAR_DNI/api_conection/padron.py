@@ -0,0 +1,243 @@
+"""Índice local del padrón reducido de SUNAT para responder consultas de RUC sin llamar a la API.
+
+El padrón (``padron_reducido_ruc.txt``) es un archivo de texto separado por ``|`` con una
+línea por contribuyente. ``PadronIndex.build`` lo convierte en una carpeta con:
+
+- ``registros.dat``: los campos útiles de cada contribuyente, una línea por registro
+- ``rucs.npy``: los RUC ordenados (uint64), se abren con memory-map
+- ``offsets.npy``: la posición de cada registro en ``registros.dat``, en el mismo orden
+- ``meta.json``: huella del padrón de origen, para no reconstruir si no cambió
+- ``ubigeos.json``: opcional, distrito, provincia y departamento de cada ubigeo
+
+Una consulta es una búsqueda binaria sobre ``rucs.npy`` y una lectura en ``registros.dat``.
+
+El padrón reducido solo trae el código de ubigeo, no los nombres de distrito, provincia y
+departamento que devuelve /v2/sunat/ruc. Para obtenerlos se indica al construir el índice una
+tabla de ubigeos (CSV con columnas ubigeo, departamento, provincia y distrito, como la que
+publica el INEI). Sin esa tabla, las respuestas del índice no traen esos tres campos.
+
+Uso (desde la carpeta VERIFICAR_DNI):
+    python -m api_conection.padron padron_reducido_ruc.txt elrayo/data/padron --ubigeos ubigeos.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+from array import array
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Columnas del padrón reducido (en orden) y nombres con los que se devuelven,
+# iguales a los de la respuesta de /v2/sunat/ruc
+COLUMNAS = [
+    ("numeroDocumento", 0), ("razonSocial", 1), ("estado", 2), ("condicion", 3), ("ubigeo", 4),
+    ("viaTipo", 5), ("viaNombre", 6), ("zonaCodigo", 7), ("zonaTipo", 8), ("numero", 9),
+    ("interior", 10), ("lote", 11), ("dpto", 12), ("manzana", 13), ("kilometro", 14),
+]
+VACIO = "-"
+CAMPOS_UBIGEO = ("departamento", "provincia", "distrito")
+
+
+def huella(path: str) -> dict:
+    """Tamaño, fecha de modificación y hash del archivo de origen"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloque)
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha.hexdigest()}
+
+
+def leer_ubigeos(path: str) -> Dict[str, Tuple[str, str, str]]:
+    """Lee la tabla de ubigeos: código de 6 dígitos -> (departamento, provincia, distrito)"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        lector = csv.DictReader(f, dialect=csv.Sniffer().sniff(muestra, delimiters=",;|\t"))
+        lector.fieldnames = [nombre.strip().lower() for nombre in lector.fieldnames]
+        faltan = {"ubigeo", *CAMPOS_UBIGEO} - set(lector.fieldnames)
+        if faltan:
+            raise ValueError(f"A la tabla de ubigeos le faltan las columnas: {', '.join(sorted(faltan))}")
+        return {
+            fila["ubigeo"].strip().zfill(6): tuple(fila[campo].strip() for campo in CAMPOS_UBIGEO)
+            for fila in lector if fila["ubigeo"] and fila["ubigeo"].strip()
+        }
+
+
+def _direccion(campos: dict) -> str:
+    partes = [campos.get(k, "") for k in ("viaTipo", "viaNombre", "numero", "interior", "lote", "dpto", "manzana", "kilometro", "zonaCodigo", "zonaTipo")]
+    return " ".join(p for p in partes if p)
+
+
+class PadronIndex:
+    """Consulta de RUC sobre el índice generado con ``build``"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._generation = None
+        self._ubigeos: Optional[Dict[str, list]] = None  # ubigeo -> [departamento, provincia, distrito]
+        self._open()
+
+    def _open(self) -> None:
+        # La carpeta "actual" apunta a la última generación construida
+        with open(os.path.join(self.directory, "actual"), encoding="utf-8") as f:
+            generacion = f.read().strip()
+        ruta = os.path.join(self.directory, generacion)
+        rucs = np.load(os.path.join(ruta, "rucs.npy"), mmap_mode="r")
+        offsets = np.load(os.path.join(ruta, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(ruta, "registros.dat"), "rb") as f:
+            datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(f.name) else b""
+        self._rucs, self._offsets, self._datos = rucs, offsets, datos
+        self._generation = generacion
+        ubigeos_path = os.path.join(self.directory, "ubigeos.json")
+        if os.path.exists(ubigeos_path):
+            with open(ubigeos_path, encoding="utf-8") as f:
+                self._ubigeos = json.load(f)
+
+    def refresh(self) -> None:
+        """Vuelve a abrir el índice si se construyó una generación nueva"""
+        with open(os.path.join(self.directory, "actual"), encoding="utf-8") as f:
+            generacion = f.read().strip()
+        if generacion != self._generation:
+            with self._lock:
+                self._open()
+
+    def __len__(self) -> int:
+        return len(self._rucs)
+
+    def __contains__(self, ruc: str) -> bool:
+        return self._position(ruc) is not None
+
+    def _position(self, ruc: str) -> Optional[int]:
+        if not ruc or not str(ruc).isdigit():
+            return None
+        clave = np.uint64(int(ruc))
+        i = int(np.searchsorted(self._rucs, clave))
+        if i < len(self._rucs) and self._rucs[i] == clave:
+            return i
+        return None
+
+    def lookup(self, ruc: str) -> Optional[dict]:
+        """Devuelve los datos del RUC con las mismas claves que la API, o None si no está.
+
+        ``distrito``, ``provincia`` y ``departamento`` solo se incluyen si el índice se construyó
+        con una tabla de ubigeos (quedan vacíos si el ubigeo no figura en ella).
+        """
+        with self._lock:
+            i = self._position(ruc)
+            if i is None:
+                return None
+            inicio = int(self._offsets[i])
+            fin = self._datos.find(b"\n", inicio)
+            linea = self._datos[inicio:fin].decode("utf-8")
+
+        valores = linea.split("|")
+        campos = {nombre: (valores[j] if valores[j] != VACIO else "") for j, (nombre, _) in enumerate(COLUMNAS)}
+        campos["tipoDocumento"] = "6"
+        campos["direccion"] = _direccion(campos)
+        if self._ubigeos is not None:
+            campos.update(zip(CAMPOS_UBIGEO, self._ubigeos.get(campos["ubigeo"], ("", "", ""))))
+        return campos
+
+    @classmethod
+    def build(
+        cls,
+        padron_path: str,
+        directory: str,
+        encoding: str = "latin-1",
+        force: bool = False,
+        ubigeos_path: Optional[str] = None,
+    ) -> "PadronIndex":
+        """Construye (o actualiza) el índice a partir de un padrón descargado de SUNAT.
+
+        ``ubigeos_path`` es la tabla de ubigeos con la que se completan distrito, provincia y
+        departamento; se guarda junto al índice y se puede cambiar sin reconstruir el padrón.
+
+        Si el padrón no cambió desde la última construcción no se hace nada. Si cambió, se
+        construye una generación nueva en otra carpeta y al final se cambia ``actual`` de forma
+        atómica, así los lectores nunca ven un índice a medio escribir.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if ubigeos_path:
+            ubigeos_json = os.path.join(directory, "ubigeos.json")
+            with open(ubigeos_json + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(leer_ubigeos(ubigeos_path), f, ensure_ascii=False)
+            os.replace(ubigeos_json + ".tmp", ubigeos_json)
+        origen = huella(padron_path)
+        meta_path = os.path.join(directory, "meta.json")
+        if not force and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("origen", {}).get("sha256") == origen["sha256"]:
+                logging.info("El padrón no cambió; se reutiliza el índice existente")
+                return cls(directory)
+            anterior = meta.get("generacion")
+        else:
+            anterior = None
+
+        generacion = origen["sha256"][:12]
+        ruta = os.path.join(directory, generacion)
+        os.makedirs(ruta, exist_ok=True)
+
+        # Se recorre el padrón una vez: cada registro se escribe compactado y se guarda su RUC
+        # y posición en arreglos compactos (16 bytes por contribuyente)
+        rucs, offsets = array("Q"), array("Q")
+        with open(padron_path, encoding=encoding, errors="replace") as origen_f, \
+                open(os.path.join(ruta, "registros.dat"), "wb") as datos_f:
+            next(origen_f, None)  # cabecera
+            posicion = 0
+            for linea in origen_f:
+                valores = linea.rstrip("\r\n").split("|")
+                ruc = valores[0].strip()
+                if len(valores) < len(COLUMNAS) or not ruc.isdigit():
+                    continue
+                registro = "|".join(
+                    (valores[j].strip() or VACIO).replace("\n", " ") for _, j in COLUMNAS
+                ).encode("utf-8") + b"\n"
+                datos_f.write(registro)
+                rucs.append(int(ruc))
+                offsets.append(posicion)
+                posicion += len(registro)
+
+        claves = np.frombuffer(rucs, dtype=np.uint64)
+        posiciones = np.frombuffer(offsets, dtype=np.uint64)
+        # Orden estable: si un RUC aparece repetido se conserva la última aparición
+        orden = np.argsort(claves, kind="stable")
+        claves, posiciones = claves[orden], posiciones[orden]
+        ultimo = np.append(claves[1:] != claves[:-1], True) if len(claves) else np.array([], dtype=bool)
+        np.save(os.path.join(ruta, "rucs.npy"), claves[ultimo])
+        np.save(os.path.join(ruta, "offsets.npy"), posiciones[ultimo])
+
+        temporal = os.path.join(directory, "actual.tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(generacion)
+        os.replace(temporal, os.path.join(directory, "actual"))
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"origen": origen, "generacion": generacion, "registros": int(ultimo.sum())}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        # La generación anterior ya no se usa (los lectores abiertos la mantienen mapeada en POSIX)
+        if anterior and anterior != generacion:
+            shutil.rmtree(os.path.join(directory, anterior), ignore_errors=True)
+        logging.info(f"Índice del padrón construido: {int(ultimo.sum())} RUCs en {ruta}")
+        return cls(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el índice local del padrón reducido de SUNAT")
+    parser.add_argument("padron", help="Archivo padron_reducido_ruc.txt")
+    parser.add_argument("carpeta", help="Carpeta donde se guarda el índice")
+    parser.add_argument("--forzar", action="store_true", help="Reconstruir aunque el padrón no haya cambiado")
+    parser.add_argument("--ubigeos", help="CSV de ubigeos (ubigeo, departamento, provincia, distrito)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    indice = PadronIndex.build(args.padron, args.carpeta, force=args.forzar, ubigeos_path=args.ubigeos)
+    print(f"{len(indice)} RUCs indexados en {args.carpeta}")
@@ -1,48 +1,72 @@
 from dotenv import load_dotenv
+import argparse
+import asyncio
+import logging
 import os
-from conection import ApisNetPe
-print(os.getcwd())
+from .async_conection import AsyncApisNetPe
+from .batch import run_batch
+from .conection import ApisNetPe
+from .tokens import load_tokens
 
 # Cargar el archivo .env desde la carpeta tokens
-dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tokens", "tk1.env")
+tokens_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tokens")
+dotenv_path = os.path.join(tokens_dir, "tk1.env")
 load_dotenv(dotenv_path)
 
-def main(dni):
-    # Leer el token desde las variables de entorno
-    APIS_TOKEN = os.getenv("APIS_TOKEN")
-    
-    if not APIS_TOKEN:
-        raise ValueError("El token de la API no está configurado en las variables de entorno.")
+def cargar_tokens():
+    # Leer todos los tokens disponibles (tk1.env, tk2.env, ...) o, si no hay, el de las variables de entorno
+    APIS_TOKENS = load_tokens(tokens_dir) or [os.getenv("APIS_TOKEN")]
 
-    
-    # Crear una instancia de la clase ApisNetPe
-    api_consultas = ApisNetPe(APIS_TOKEN)
+    if not any(APIS_TOKENS):
+        raise ValueError("El token de la API no está configurado en las variables de entorno.")
+    return APIS_TOKENS
 
-    # Realizar consulta para el DNI y RUC
-    n_dni = dni  # Reemplaza por un DNI real
-    # n_ruc = ruc  # Reemplaza por un RUC real
+def main(dni):
+    # Crear una instancia de la clase ApisNetPe que reparte las consultas entre los tokens
+    with ApisNetPe(cargar_tokens()) as api_consultas:
+        # Verificar el DNI
+        result_dni = api_consultas.get_person(dni)
 
-    # Verificar el DNI
-    # print("Consulta DNI:")
-    result_dni = api_consultas.get_person(n_dni)
-    if result_dni:
-        print (result_dni )# print(result_dni)
-    else:
+    if not result_dni:
         print("No se pudo obtener la información del DNI")
+    return result_dni
+
+def main_lote(entrada, columna, salida, tipo="dni", concurrencia=20, hoja=0):
+    # Consulta masiva: los resultados se escriben a medida que llegan y una ejecución
+    # interrumpida (Ctrl-C, caída) continúa desde el checkpoint en la siguiente
+    async def ejecutar():
+        async with AsyncApisNetPe(cargar_tokens(), concurrency=concurrencia) as cliente:
+            return await run_batch(cliente, entrada, columna, salida, tipo=tipo, sheet_name=hoja)
 
-    # # Verificar el RUC
-    # print("\nConsulta RUC:")
-    # result_ruc = api_consultas.get_company(n_ruc)
-    # if result_ruc:
-    #     print(result_ruc)
-    # else:
-    #     print("No se pudo obtener la información del RUC")
+    try:
+        procesados = asyncio.run(ejecutar())
+        print(f"{procesados} números consultados. Resultados en {salida}")
+    except KeyboardInterrupt:
+        print(f"Proceso interrumpido. Vuelva a ejecutar el mismo comando para continuar desde {salida}.checkpoint")
 
 
 if __name__ == "__main__":
-    # Solicitar al usuario los valores de DNI y RUC
-    dni = "76173899"
-    # ruc = input("Ingresar número de RUC: ")
+    # Uso (desde la carpeta VERIFICAR_DNI):
+    #   python -m api_conection.query <dni>
+    #   python -m api_conection.query --entrada base.xlsx --columna DNI --salida resultados.csv
+    parser = argparse.ArgumentParser(description="Consulta de DNIs y RUCs en apis.net.pe")
+    parser.add_argument("dni", nargs="?", help="DNI a consultar (consulta individual)")
+    parser.add_argument("--entrada", help="Archivo Excel o CSV con los números a consultar")
+    parser.add_argument("--columna", default="DNI", help="Columna que contiene los números")
+    parser.add_argument("--hoja", default=0, help="Hoja del Excel (nombre o índice)")
+    parser.add_argument("--salida", help="Archivo .csv o carpeta Parquet de resultados")
+    parser.add_argument("--tipo", choices=["dni", "ruc"], default="dni")
+    parser.add_argument("--concurrencia", type=int, default=20, help="Consultas simultáneas")
+    args = parser.parse_args()
 
-    # Llamar a la función main con los valores ingresados por el usuario
-    main(dni)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.entrada:
+        if not args.salida:
+            parser.error("--salida es obligatorio al procesar un archivo")
+        hoja = int(args.hoja) if str(args.hoja).isdigit() else args.hoja
+        main_lote(args.entrada, args.columna, args.salida, args.tipo, args.concurrencia, hoja)
+    elif args.dni:
+        print(main(args.dni))
+    else:
+        parser.error("indique un DNI o un archivo con --entrada")
@@ -0,0 +1,175 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Espera exponencial con jitter completo para el reintento número `attempt` (desde 0)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Interpreta la cabecera Retry-After (segundos o fecha HTTP) y devuelve los segundos de espera"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket que ajusta su tasa según las respuestas 429 de la API.
+
+    Sin ``rate`` inicial no limita hasta recibir el primer 429; en ese momento fija la tasa
+    en la observada multiplicada por ``decrease``. Tras cada respuesta correcta la tasa sube
+    de forma aditiva, y mucho más despacio al acercarse a la tasa donde se recibió el último
+    429, de modo que se estabiliza justo por debajo del límite del proveedor.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: float = 1.0,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        decrease: float = 0.8,
+        increase: float = 0.05,
+        window: float = 5.0,
+        settle: float = 1.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease = decrease
+        self.increase = increase
+        self.window = window
+        # Los 429 que llegan menos de `settle` segundos después de una reducción se deben a
+        # solicitudes ya en curso y no vuelven a reducir la tasa
+        self.settle = settle
+        self._last_decrease = float("-inf")
+        # Tasa a la que se recibió el último 429
+        self.ceiling: Optional[float] = None
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def observed_rate(self) -> float:
+        """Solicitudes por segundo realizadas en la última ventana"""
+        with self._lock:
+            return self._observed(time.monotonic())
+
+    def _observed(self, ahora: float) -> float:
+        while self._recent and self._recent[0] < ahora - self.window:
+            self._recent.popleft()
+        if not self._recent:
+            return 0.0
+        # Al inicio la ventana aún no está completa: se divide por el tiempo realmente transcurrido
+        return len(self._recent) / max(ahora - self._recent[0], 1.0)
+
+    def acquire(self) -> None:
+        """Bloquea hasta que se pueda enviar la siguiente solicitud"""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                espera = self._paused_until - ahora
+                if espera <= 0:
+                    if self.rate is None:
+                        self._recent.append(ahora)
+                        return
+                    self._tokens = min(self.burst, self._tokens + (ahora - self._last) * self.rate)
+                    self._last = ahora
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._recent.append(ahora)
+                        return
+                    espera = (1 - self._tokens) / self.rate
+            time.sleep(espera)
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate is None:
+                return
+            paso = self.increase
+            if self.ceiling is not None and self.rate >= self.ceiling * self.decrease:
+                # Cerca del límite conocido se sondea con pasos diez veces menores
+                paso /= 10
+            self.rate += paso / max(self.rate, 1.0)
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        """Reduce la tasa tras un 429 y, si la API lo indica, pausa hasta Retry-After"""
+        with self._lock:
+            ahora = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, ahora + retry_after)
+            if ahora - self._last_decrease < self.settle:
+                return
+            self._last_decrease = ahora
+            actual = self.rate if self.rate is not None else self._observed(ahora)
+            self.ceiling = actual
+            self.rate = max(self.min_rate, actual * self.decrease)
+            self._tokens = 0.0
+        logging.info(f"Límite de solicitudes alcanzado: nueva tasa {self.rate:.2f} req/s")
+
+
+class CircuitBreaker:
+    """Deja de enviar solicitudes durante `reset_timeout` segundos tras un bloqueo de IP (403).
+
+    Pasado ese tiempo permite una única solicitud de prueba; si responde se cierra el circuito
+    y si vuelve a recibir 403 se abre de nuevo. Las respuestas de solicitudes que no son la de
+    prueba (por ejemplo las que ya estaban en curso al abrirse) no cierran el circuito.
+    """
+
+    def __init__(self, reset_timeout: float = 300.0) -> None:
+        self.reset_timeout = reset_timeout
+        self._open_until: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_until is not None
+
+    def allow(self) -> Optional[bool]:
+        """None si el circuito está abierto; si no, True cuando la solicitud es la de prueba"""
+        with self._lock:
+            if self._open_until is None:
+                return False
+            if time.monotonic() < self._open_until or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return True
+
+    def trip(self) -> None:
+        with self._lock:
+            self._open_until = time.monotonic() + self.reset_timeout
+            self._trial_in_flight = False
+        logging.error(f"IP bloqueada: se suspenden las solicitudes durante {self.reset_timeout:.0f}s")
+
+    def release_trial(self, trial: bool) -> None:
+        # La solicitud de prueba no llegó a la API (error de red): se permite otra
+        if not trial:
+            return
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self, trial: bool) -> None:
+        # Solo la solicitud de prueba cierra el circuito
+        if not trial:
+            return
+        with self._lock:
+            self._open_until = None
+            self._trial_in_flight = False
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterable, List, Optional, Tuple
+
+from .conection import ApisNetPe, DNI_PATH, RUC_PATH
+from .tokens import seconds_until_next_period
+
+# Clases de prioridad: un número menor se atiende antes
+INTERACTIVE = 0
+BATCH = 1
+
+
+class LookupScheduler:
+    """Cola con prioridades delante de ApisNetPe para mezclar consultas manuales y masivas.
+
+    Las consultas ``INTERACTIVE`` siempre se atienden antes que las ``BATCH`` y además tienen
+    ``interactive_workers`` hilos reservados, así que nunca esperan detrás de un lote: como
+    máximo esperan a que termine otra consulta interactiva. Si el pool de tokens tiene cuota
+    diaria/mensual, las consultas ``BATCH`` se reparten a lo largo del periodo restante y no
+    pueden gastar la fracción ``interactive_reserve`` de la cuota.
+    """
+
+    # Cada cuántos segundos se guarda el consumo de cuota de los tokens
+    SAVE_USAGE_EVERY = 30.0
+
+    def __init__(
+        self,
+        client: ApisNetPe,
+        workers: int = 4,
+        interactive_workers: int = 1,
+        interactive_reserve: float = 0.1,
+    ) -> None:
+        self.client = client
+        self.interactive_reserve = interactive_reserve
+        self._queue: List[Tuple[int, int, str, str, Future]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._next_batch_at = 0.0
+        self._last_save = time.monotonic()
+
+        self._threads = [
+            threading.Thread(target=self._worker, args=(False,), daemon=True, name=f"scheduler-{i}")
+            for i in range(workers)
+        ] + [
+            threading.Thread(target=self._worker, args=(True,), daemon=True, name=f"scheduler-interactivo-{i}")
+            for i in range(interactive_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Deja de aceptar consultas, espera las que están en curso y cancela las pendientes"""
+        with self._cond:
+            self._closed = True
+            pendientes, self._queue = self._queue, []
+            self._cond.notify_all()
+        for *_, future in pendientes:
+            future.cancel()
+        for thread in self._threads:
+            thread.join()
+        self.client.tokens.save_usage()
+
+    def __enter__(self) -> "LookupScheduler":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def submit(self, path: str, numero: str, priority: int = BATCH) -> Future:
+        """Encola una consulta; el Future se resuelve con (datos, estado)"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El planificador está cerrado.")
+            heapq.heappush(self._queue, (priority, next(self._seq), path, numero, future))
+            self._cond.notify_all()
+        return future
+
+    # Consultas individuales (interactivas por defecto) y masivas (batch por defecto)
+    def get_person(self, dni: str, priority: int = INTERACTIVE) -> Optional[dict]:
+        """Consulta información de una persona por su DNI"""
+        return self.submit(DNI_PATH, dni, priority).result()[0]
+
+    def get_company(self, ruc: str, priority: int = INTERACTIVE) -> Optional[dict]:
+        """Consulta información de una empresa por su RUC"""
+        return self.submit(RUC_PATH, ruc, priority).result()[0]
+
+    def submit_people(self, dnis: Iterable[str], priority: int = BATCH) -> List[Future]:
+        return [self.submit(DNI_PATH, dni, priority) for dni in dnis]
+
+    def submit_companies(self, rucs: Iterable[str], priority: int = BATCH) -> List[Future]:
+        return [self.submit(RUC_PATH, ruc, priority) for ruc in rucs]
+
+    def _batch_interval(self) -> Tuple[bool, float]:
+        # Intervalo mínimo entre consultas BATCH para repartir la cuota restante en el periodo.
+        # Se usa el más restrictivo entre la cuota diaria y la mensual. Devuelve (hay cuota,
+        # intervalo); sin cuota, el intervalo son los segundos hasta el próximo periodo.
+        restante = self.client.tokens.remaining()
+        total = self.client.tokens.budget()
+        segundos = seconds_until_next_period()
+        intervalo = 0.0
+        for restante_periodo, total_periodo, segundos_periodo in zip(restante, total, segundos):
+            if restante_periodo is None:
+                continue
+            disponible = restante_periodo - self.interactive_reserve * total_periodo
+            if disponible < 1:
+                # Sin cuota para lotes hasta el próximo periodo
+                return False, segundos_periodo
+            intervalo = max(intervalo, segundos_periodo / disponible)
+        return True, intervalo
+
+    def _next_job(self, interactive_only: bool):
+        # Se llama con el lock tomado. Devuelve el siguiente trabajo o None si hay que esperar.
+        while True:
+            if self._closed:
+                return None
+            ahora = time.monotonic()
+            espera = None
+            if self._queue:
+                priority = self._queue[0][0]
+                if priority == INTERACTIVE:
+                    return heapq.heappop(self._queue)
+                if not interactive_only:
+                    if self._next_batch_at <= ahora:
+                        hay_cuota, intervalo = self._batch_interval()
+                        self._next_batch_at = ahora + intervalo
+                        if hay_cuota:
+                            return heapq.heappop(self._queue)
+                        # Sin cuota el trabajo sigue en la cola hasta que se renueve
+                    espera = max(self._next_batch_at - ahora, 0.0)
+            # Una nueva consulta interactiva despierta a los hilos aunque estén esperando turno
+            self._cond.wait(espera)
+
+    def _worker(self, interactive_only: bool) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job(interactive_only)
+            if job is None:
+                return
+            _, _, path, numero, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.client.fetch(path, {"numero": numero}))
+            except Exception as e:
+                logging.error(f"Error al consultar {numero}: {e}")
+                future.set_exception(e)
+            self._maybe_save_usage()
+
+    def _maybe_save_usage(self) -> None:
+        ahora = time.monotonic()
+        with self._cond:
+            if ahora - self._last_save < self.SAVE_USAGE_EVERY:
+                return
+            self._last_save = ahora
+        self.client.tokens.save_usage()
@@ -0,0 +1,177 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import dotenv_values
+
+
+class NoTokenAvailable(Exception):
+    """Todos los tokens del pool fueron descartados por inválidos o limitados"""
+
+
+class TokenPool:
+    """Reparte las solicitudes entre varios tokens en rotación (round robin).
+
+    Un token que responde 401 se retira de la rotación y uno que responde 429
+    queda en enfriamiento durante ``cooldown`` segundos. Opcionalmente cada token tiene una
+    cuota diaria y mensual (``daily_limit``/``monthly_limit``); al agotarla deja de usarse hasta
+    el siguiente día o mes. Con ``usage_path`` el consumo se guarda en disco entre ejecuciones.
+    """
+
+    def __init__(
+        self,
+        tokens: Iterable[str],
+        cooldown: float = 60.0,
+        daily_limit: Optional[int] = None,
+        monthly_limit: Optional[int] = None,
+        usage_path: Optional[str] = None,
+    ) -> None:
+        # dict.fromkeys conserva el orden y descarta tokens repetidos
+        self.tokens: List[str] = list(dict.fromkeys(t for t in tokens if t))
+        if not self.tokens:
+            raise ValueError("Se necesita al menos un token para crear el pool.")
+        self.cooldown = cooldown
+        self.daily_limit = daily_limit
+        self.monthly_limit = monthly_limit
+        self.usage_path = usage_path
+        self._disabled = set()
+        self._cooling: Dict[str, float] = {}
+        # Consumo por token: {token: {"dia": "AAAA-MM-DD", "n_dia": int, "mes": "AAAA-MM", "n_mes": int}}
+        self._usage: Dict[str, dict] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        if usage_path and os.path.exists(usage_path):
+            self._load_usage()
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def active(self) -> List[str]:
+        """Tokens que siguen en rotación (incluye los que están en enfriamiento)"""
+        return [t for t in self.tokens if t not in self._disabled]
+
+    def acquire(self) -> str:
+        """Devuelve el siguiente token disponible; espera si todos están en enfriamiento"""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                espera = None
+                for _ in range(len(self.tokens)):
+                    token = self.tokens[self._next]
+                    self._next = (self._next + 1) % len(self.tokens)
+                    if token in self._disabled or self._exhausted(token):
+                        continue
+                    hasta = self._cooling.get(token, 0.0)
+                    if hasta <= ahora:
+                        self._record_use(token)
+                        return token
+                    espera = hasta - ahora if espera is None else min(espera, hasta - ahora)
+                if espera is None:
+                    raise NoTokenAvailable("Todos los tokens están inválidos, limitados o sin cuota.")
+            time.sleep(espera)
+
+    def disable(self, token: str) -> None:
+        """Retira el token de la rotación (respuesta 401)"""
+        with self._lock:
+            if token not in self._disabled:
+                self._disabled.add(token)
+                logging.warning(f"Token ...{token[-4:]} retirado de la rotación (inválido o limitado)")
+
+    def cool_down(self, token: str, seconds: Optional[float] = None) -> None:
+        """Pausa el token durante `seconds` segundos, o `cooldown` por defecto (respuesta 429)"""
+        with self._lock:
+            pausa = seconds if seconds is not None else self.cooldown
+            self._cooling[token] = time.monotonic() + pausa
+
+    # Cuota diaria y mensual por token
+
+    @staticmethod
+    def _periods(now: Optional[datetime] = None) -> Tuple[str, str]:
+        now = now or datetime.now()
+        return now.strftime("%Y-%m-%d"), now.strftime("%Y-%m")
+
+    def _counts(self, token: str) -> Tuple[int, int]:
+        dia, mes = self._periods()
+        uso = self._usage.get(token, {})
+        n_dia = uso.get("n_dia", 0) if uso.get("dia") == dia else 0
+        n_mes = uso.get("n_mes", 0) if uso.get("mes") == mes else 0
+        return n_dia, n_mes
+
+    def _exhausted(self, token: str) -> bool:
+        n_dia, n_mes = self._counts(token)
+        return (self.daily_limit is not None and n_dia >= self.daily_limit) or (
+            self.monthly_limit is not None and n_mes >= self.monthly_limit
+        )
+
+    def _record_use(self, token: str) -> None:
+        n_dia, n_mes = self._counts(token)
+        dia, mes = self._periods()
+        self._usage[token] = {"dia": dia, "n_dia": n_dia + 1, "mes": mes, "n_mes": n_mes + 1}
+
+    def remaining(self) -> Tuple[Optional[int], Optional[int]]:
+        """Cuota restante (día, mes) sumando los tokens activos; None si no hay límite"""
+        with self._lock:
+            activos = self.active
+            conteos = [self._counts(t) for t in activos]
+        dia = sum(max(0, self.daily_limit - n) for n, _ in conteos) if self.daily_limit is not None else None
+        mes = sum(max(0, self.monthly_limit - n) for _, n in conteos) if self.monthly_limit is not None else None
+        return dia, mes
+
+    def budget(self) -> Tuple[Optional[int], Optional[int]]:
+        """Cuota total (día, mes) de los tokens activos; None si no hay límite"""
+        activos = len(self.active)
+        return (
+            self.daily_limit * activos if self.daily_limit is not None else None,
+            self.monthly_limit * activos if self.monthly_limit is not None else None,
+        )
+
+    @staticmethod
+    def _token_id(token: str) -> str:
+        # En el archivo de consumo no se guarda el token, solo un identificador derivado
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    def _load_usage(self) -> None:
+        with open(self.usage_path, encoding="utf-8") as f:
+            guardado = json.load(f)
+        for token in self.tokens:
+            if self._token_id(token) in guardado:
+                self._usage[token] = guardado[self._token_id(token)]
+
+    def save_usage(self) -> None:
+        """Guarda el consumo de cuota en `usage_path` (escritura atómica)"""
+        if not self.usage_path:
+            return
+        with self._lock:
+            datos = {self._token_id(t): uso for t, uso in self._usage.items()}
+        temporal = self.usage_path + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f)
+        os.replace(temporal, self.usage_path)
+
+
+def seconds_until_next_period(now: Optional[datetime] = None) -> Tuple[float, float]:
+    """Segundos que faltan para el próximo día y para el próximo mes"""
+    now = now or datetime.now()
+    manana = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if now.month == 12:
+        proximo_mes = now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        proximo_mes = now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return (manana - now).total_seconds(), (proximo_mes - now).total_seconds()
+
+
+def load_tokens(directory: str, pattern: str = "tk*.env", variable: str = "APIS_TOKEN") -> List[str]:
+    """Lee el token de cada archivo .env de la carpeta (tk1.env, tk2.env, ...)"""
+    tokens = []
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        token = dotenv_values(path).get(variable)
+        if token:
+            tokens.append(token)
+    return tokens
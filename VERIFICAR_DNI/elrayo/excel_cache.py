@@ -0,0 +1,105 @@
+"""Lectura de bases Excel con copia en Parquet.
+
+Leer un Excel grande con openpyxl tarda decenas de segundos. ``leer_excel`` guarda la hoja
+leída en un Parquet junto al libro (carpeta ``.cache_excel``) y las siguientes lecturas
+cargan ese Parquet. Cada entrada se identifica por la ruta del libro, la hoja y los
+``dtype`` pedidos, y guarda el tamaño, la fecha de modificación y el hash del libro:
+
+- si tamaño y fecha coinciden, se usa el Parquet directamente
+- si cambió la fecha, se recalcula el hash; si el contenido es el mismo se sigue usando
+- si el contenido cambió, la entrada se descarta y se vuelve a leer el Excel
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+
+CARPETA_CACHE = ".cache_excel"
+
+
+def _hash_archivo(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _clave(path: str, sheet_name, dtype) -> str:
+    texto = json.dumps([os.path.abspath(path), sheet_name, repr(dtype)])
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _vigente(meta: dict, path: str, stat: os.stat_result, meta_path: str) -> bool:
+    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if meta.get("size") != stat.st_size or meta.get("sha256") != _hash_archivo(path):
+        return False
+    # Solo cambió la fecha (copiado, guardado sin cambios): se actualiza la entrada
+    meta["mtime_ns"] = stat.st_mtime_ns
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return True
+
+
+def _columnas_texto(df: pd.DataFrame) -> pd.DataFrame:
+    # Parquet exige un tipo por columna: las columnas con números y texto mezclados (DNIs
+    # escritos a veces como número y a veces como texto) se pasan a texto, sin tocar los vacíos
+    mezcladas = [
+        columna for columna in df.columns[df.dtypes == object]
+        if pd.api.types.infer_dtype(df[columna], skipna=True) in ("mixed", "mixed-integer")
+    ]
+    if not mezcladas:
+        return df
+    df = df.copy()
+    for columna in mezcladas:
+        valores = [v if pd.isna(v) else str(v) for v in df[columna]]
+        df[columna] = pd.Series(valores, index=df.index, dtype=str)
+    return df
+
+
+def leer_excel(path: str, sheet_name=0, dtype=None, cache_dir: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """Igual que ``pd.read_excel`` para una hoja, pero usando la copia en Parquet si está vigente"""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CARPETA_CACHE)
+    clave = _clave(path, sheet_name, dtype if not kwargs else (dtype, sorted(kwargs.items())))
+    parquet_path = os.path.join(cache_dir, f"{clave}.parquet")
+    meta_path = os.path.join(cache_dir, f"{clave}.json")
+
+    stat = os.stat(path)
+    if os.path.exists(parquet_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if _vigente(meta, path, stat, meta_path):
+            return pd.read_parquet(parquet_path)
+        logging.info(f"El libro {path} cambió; se descarta la copia en Parquet")
+
+    # La misma conversión se devuelve también en esta lectura, para que el resultado no
+    # dependa de si vino del Excel o del Parquet
+    df = _columnas_texto(pd.read_excel(path, sheet_name=sheet_name, dtype=dtype, **kwargs))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        # Se escribe en un temporal y se reemplaza, para no dejar un Parquet a medias
+        df.to_parquet(parquet_path + ".tmp")
+    except (ValueError, TypeError, ImportError) as e:
+        # Sin pyarrow, o con columnas de objetos que Parquet no sabe guardar
+        logging.warning(f"No se pudo guardar la copia en Parquet de {path}: {e}")
+        if os.path.exists(parquet_path + ".tmp"):
+            os.remove(parquet_path + ".tmp")
+        return df
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # Sin meta la entrada queda inválida hasta terminar de escribirla
+    os.replace(parquet_path + ".tmp", parquet_path)
+    meta = {
+        "path": os.path.abspath(path),
+        "sheet_name": sheet_name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _hash_archivo(path),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return df
@@ -1,67 +1,149 @@
+# Uso (desde la carpeta VERIFICAR_DNI):
+#   python -m elrayo.imagen_documento [--modo hardlink] [--dry-run | --reanudar | --revertir]
+import argparse
+import errno
 import os
 import shutil
-import pandas as pd
-
-# Paso 1: Cargar la base de datos original y crear una copia
-df_original = pd.read_excel("elrayo/data/db_original/Base_Etna_2.12.24-1.xlsx", sheet_name="Base_Etna_2.12")
-df_copia = df_original.copy()  # Crear una copia de la base
-
-# Carpetas
-carpeta_origen = "elrayo/data/docs_originales"  # Carpeta donde están los archivos
-carpeta_destino = "elrayo/data/docs_validados"  # Carpeta para guardar los archivos coincidentes
-
-# Crear la carpeta destino si no existe
-if not os.path.exists(carpeta_destino):
-    os.makedirs(carpeta_destino)
-
-# Paso 2: Separar los archivos en la nueva carpeta
-for index, row in df_copia.iterrows():
-    archivo = row["Imagen Documento"]  # Nombre del archivo en la columna
-    archivo = archivo.replace("etna/", "").strip()  # Eliminar el prefijo "etna/" y aplicar strip
-    ruta_origen = os.path.join(carpeta_origen, archivo)
-    ruta_destino = os.path.join(carpeta_destino, archivo)
-
-    if os.path.exists(ruta_origen):  # Verificar si el archivo existe en la carpeta origen
-        shutil.copy(ruta_origen, ruta_destino)  # Copiar el archivo a la carpeta destino
-        print(f"Archivo encontrado y copiado: {archivo}")
-    else:
-        print(f"Archivo no encontrado: {archivo}")
-
-# Paso 3: Renombrar los archivos en la nueva carpeta y actualizar la base de datos
-for index, row in df_copia.iterrows():
-    archivo_original = row["Imagen Documento"]  # Nombre original del archivo
-    archivo_original = archivo_original.replace("etna/", "").strip()  # Eliminar el prefijo "etna/" y aplicar strip
-    ruta_archivo = os.path.join(carpeta_destino, archivo_original)
-
-    if os.path.exists(ruta_archivo):
-        # Obtener el nombre y apellido de la fila, aplicando strip para limpiar espacios
-        nombre = row["Nombre"].strip()
-        apellido = row["Apellido"].strip()
-
-        # Determinar la extensión del archivo original
-        _, extension = os.path.splitext(archivo_original)
-
-        # Crear el nuevo nombre del archivo
-        nuevo_nombre = f"{nombre} {apellido}{extension}"
-
-        # Evitar conflictos de nombres
-        nueva_ruta = os.path.join(carpeta_destino, nuevo_nombre)
-        contador = 1
-        while os.path.exists(nueva_ruta):  # Si el archivo ya existe, agregar un sufijo
-            nuevo_nombre = f"{nombre} {apellido} ({contador}){extension}"
-            nueva_ruta = os.path.join(carpeta_destino, nuevo_nombre)
-            contador += 1
-
-        # Renombrar el archivo
-        os.rename(ruta_archivo, nueva_ruta)
-        print(f"Archivo renombrado: {archivo_original} -> {nuevo_nombre}")
-
-        # Actualizar la columna "Imagen Documento" en la base de datos
-        df_copia.at[index, "Imagen Documento"] = nuevo_nombre
+from concurrent.futures import ThreadPoolExecutor
+from .excel_cache import leer_excel
+from .renombrar import JOURNAL, aplicar, escribir_journal, imprimir_plan, journal_incompleto, planificar, revertir
+
+# Rutas por defecto (relativas a la carpeta VERIFICAR_DNI)
+ARCHIVO_BASE = "elrayo/data/db_original/Base_Etna_2.12.24-1.xlsx"
+HOJA_BASE = "Base_Etna_2.12"
+CARPETA_ORIGEN = "elrayo/data/docs_originales"  # Carpeta donde están los archivos
+CARPETA_DESTINO = "elrayo/data/docs_validados"  # Carpeta para guardar los archivos coincidentes
+ARCHIVO_SALIDA = "elrayo/data/db_pruebas/Base_Corregida.xlsx"
+
+# ioctl de Linux para clonar un archivo (reflink) en sistemas de archivos que lo soportan (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+def limpiar_nombre(archivo):
+    # Eliminar el prefijo "etna/" y aplicar strip
+    return str(archivo).replace("etna/", "").strip()
+
+
+def indexar_carpeta(carpeta):
+    # Recorre la carpeta una sola vez y devuelve {nombre de archivo: ruta}. La clave usa
+    # normcase: en Windows "Foto.JPG" en el Excel es el mismo archivo que "foto.jpg" en el disco
+    with os.scandir(carpeta) as entradas:
+        return {os.path.normcase(entrada.name): entrada.path for entrada in entradas if entrada.is_file()}
+
+
+def _reflink(origen, destino):
+    import fcntl  # Solo existe en sistemas POSIX
+
+    with open(origen, "rb") as f_origen, open(destino, "wb") as f_destino:
+        fcntl.ioctl(f_destino.fileno(), FICLONE, f_origen.fileno())
+
+
+def transferir(origen, destino, modo="copy"):
+    """Copia el archivo, o crea un enlace duro / reflink si se pide y el sistema de archivos lo permite.
+
+    Si el enlace no es posible (otro disco, sistema de archivos sin soporte) se copia normalmente.
+    """
+    if modo in ("hardlink", "reflink") and os.path.exists(destino):
+        os.remove(destino)  # os.link no sobrescribe y el reflink necesita un destino nuevo
+    try:
+        if modo == "hardlink":
+            os.link(origen, destino)
+            return modo
+        if modo == "reflink":
+            _reflink(origen, destino)
+            return modo
+    except (OSError, ImportError) as e:
+        if isinstance(e, OSError) and e.errno not in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY):
+            raise
+    shutil.copy(origen, destino)
+    return "copy"
+
+
+def resolver_archivos(df, indice):
+    # Resuelve cada "Imagen Documento" contra el índice de la carpeta de origen
+    encontrados = []
+    vistos = set()
+    for archivo in df["Imagen Documento"].map(limpiar_nombre).drop_duplicates():
+        clave = os.path.normcase(archivo)
+        if clave in vistos:
+            continue  # El mismo archivo escrito con otras mayúsculas (en Windows)
+        if clave in indice:
+            vistos.add(clave)
+            encontrados.append(archivo)
+        else:
+            print(f"Archivo no encontrado: {archivo}")
+    return encontrados
+
+
+def copiar_archivos(df, carpeta_origen, carpeta_destino, modo="copy", hilos=8):
+    # Paso 2: Resolver todos los archivos contra el índice de la carpeta y copiarlos en paralelo
+    indice = indexar_carpeta(carpeta_origen)
+    encontrados = resolver_archivos(df, indice)
+
+    def copiar(archivo):
+        return archivo, transferir(indice[os.path.normcase(archivo)], os.path.join(carpeta_destino, archivo), modo)
+
+    # Las copias esperan sobre todo al disco o a la red, por eso se usan hilos
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        for archivo, modo_usado in executor.map(copiar, encontrados):
+            print(f"Archivo encontrado y copiado ({modo_usado}): {archivo}")
+    return set(encontrados)
+
+
+def actualizar_base(df_copia, plan):
+    # Actualizar la columna "Imagen Documento" con el nombre final de cada archivo
+    for paso in plan:
+        df_copia.at[paso["index"], "Imagen Documento"] = paso["destino"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Separa y renombra las imágenes de documentos de la base")
+    parser.add_argument("--modo", choices=["copy", "hardlink", "reflink"], default="copy",
+                        help="copy copia los archivos; hardlink/reflink evitan copiar si origen y destino están en el mismo disco")
+    parser.add_argument("--hilos", type=int, default=8, help="Copias simultáneas")
+    parser.add_argument("--dry-run", action="store_true", help="Solo muestra el plan de renombrado, sin tocar el disco")
+    parser.add_argument("--reanudar", action="store_true", help="Continúa un renombrado interrumpido desde el journal")
+    parser.add_argument("--revertir", action="store_true", help="Deshace los renombrados registrados en el journal")
+    args = parser.parse_args()
+
+    journal = os.path.join(CARPETA_DESTINO, JOURNAL)
+    if args.revertir:
+        print(f"{revertir(journal)} archivos restaurados a su nombre original")
+        return
+
+    # Paso 1: Cargar la base de datos original y crear una copia
+    df_original = leer_excel(ARCHIVO_BASE, sheet_name=HOJA_BASE)  # Usa la copia en Parquet si el libro no cambió
+    df_copia = df_original.copy()  # Crear una copia de la base
+
+    if args.reanudar:
+        plan = aplicar(journal)
     else:
-        print(f"Archivo no encontrado en carpeta destino: {archivo_original}")
+        # Un plan nuevo sobrescribiría el journal del renombrado interrumpido, que es lo único
+        # que permite reanudarlo o revertirlo
+        if journal_incompleto(journal):
+            parser.error(f"hay un renombrado sin terminar en {journal}; use --reanudar para completarlo o --revertir para deshacerlo")
+        existentes = set(indexar_carpeta(CARPETA_DESTINO)) if os.path.isdir(CARPETA_DESTINO) else set()
+        if args.dry_run:
+            disponibles = set(resolver_archivos(df_copia, indexar_carpeta(CARPETA_ORIGEN)))
+            imprimir_plan(planificar(df_copia, disponibles, existentes | disponibles))
+            return
+
+        # Crear la carpeta destino si no existe
+        os.makedirs(CARPETA_DESTINO, exist_ok=True)
+
+        disponibles = copiar_archivos(df_copia, CARPETA_ORIGEN, CARPETA_DESTINO, args.modo, args.hilos)
+
+        # Paso 3: Planificar todos los nombres en memoria, guardar el journal y renombrar en una pasada
+        plan = planificar(df_copia, disponibles, existentes | disponibles)
+        escribir_journal(plan, CARPETA_DESTINO, journal)
+        aplicar(journal)
+
+    actualizar_base(df_copia, plan)
+
+    # Paso 4: Exportar la base de datos corregida a un archivo Excel
+    df_copia.to_excel(ARCHIVO_SALIDA, index=False)
+    print(f"Base corregida exportada a {ARCHIVO_SALIDA}")
+
 
-# Paso 4: Exportar la base de datos corregida a un archivo Excel
-archivo_salida = "elrayo/data/db_pruebas/Base_Corregida.xlsx"
-df_copia.to_excel(archivo_salida, index=False)
-print(f"Base corregida exportada a {archivo_salida}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Comparación de nombres de la base de datos con los nombres devueltos por la API.
+
+Reemplaza a ``comparar_4_caracteres_consecutivos`` del notebook: en lugar de buscar 4
+caracteres iguales en la misma posición, calcula un puntaje numérico entre 0 y 1 que
+combina similitud de trigramas (tolera errores de tipeo y letras corridas) y de palabras
+(tolera nombres incompletos, p. ej. "JUAN" frente a "JUAN CARLOS").
+
+Se trabaja por columnas completas: la normalización usa las operaciones de texto de
+pandas, y los trigramas se calculan una sola vez por cada texto distinto y se reutilizan
+para todas las filas que lo repiten (los nombres se repiten mucho en bases grandes).
+"""
+from typing import Dict, FrozenSet, Tuple
+
+import numpy as np
+import pandas as pd
+
+UMBRAL = 0.6
+
+# Partículas de nombres compuestos: no cuentan como palabras en común ("DE LA CRUZ" frente a
+# "DE LA TORRE" no comparten ningún apellido)
+PARTICULAS = frozenset({"DE", "DEL", "LA", "LAS", "LOS", "Y", "VDA"})
+
+
+def normalizar(serie: pd.Series) -> pd.Series:
+    """Mayúsculas, sin tildes ni signos, espacios simples; los vacíos quedan como ''"""
+    return (
+        serie.fillna("").astype(str)
+        .str.upper()
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.replace(r"[^A-Z ]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _ngramas(texto: str, n: int) -> FrozenSet[str]:
+    relleno = f" {texto} "
+    return frozenset(relleno[i:i + n] for i in range(len(relleno) - n + 1))
+
+
+def _palabras(texto: str) -> FrozenSet[str]:
+    todas = frozenset(texto.split())
+    # Si el texto solo tiene partículas se conservan, para no dejarlo vacío
+    return (todas - PARTICULAS) or todas
+
+
+def similitud(a: pd.Series, b: pd.Series, n: int = 3) -> pd.Series:
+    """Puntaje 0-1 fila a fila entre dos columnas de texto ya normalizadas.
+
+    Es el máximo entre el coeficiente de Dice de n-gramas de caracteres y la proporción de
+    palabras del texto más corto que aparecen en el otro, sin contar las partículas (DE, LA,
+    DEL...). Dos vacíos puntúan 0.
+    """
+    # Índice de textos distintos de ambas columnas: cada uno se procesa una sola vez
+    codigos, unicos = pd.factorize(pd.concat([a, b], ignore_index=True), sort=False)
+    codigos_a, codigos_b = codigos[:len(a)], codigos[len(a):]
+    gramas = [_ngramas(t, n) for t in unicos]
+    palabras = [_palabras(t) for t in unicos]
+
+    cache: Dict[Tuple[int, int], float] = {}
+
+    def puntaje(i: int, j: int) -> float:
+        if i == j:
+            return 1.0 if unicos[i] else 0.0
+        clave = (i, j) if i < j else (j, i)
+        valor = cache.get(clave)
+        if valor is None:
+            ga, gb = gramas[i], gramas[j]
+            pa, pb = palabras[i], palabras[j]
+            dice = 2 * len(ga & gb) / (len(ga) + len(gb)) if ga and gb and unicos[i] and unicos[j] else 0.0
+            solape = len(pa & pb) / min(len(pa), len(pb)) if pa and pb else 0.0
+            valor = cache[clave] = max(dice, solape)
+        return valor
+
+    puntajes = np.fromiter((puntaje(i, j) for i, j in zip(codigos_a, codigos_b)), dtype=float, count=len(a))
+    return pd.Series(puntajes, index=a.index)
+
+
+def comparar_nombres(
+    df: pd.DataFrame,
+    nombre_db: str = "Nombre",
+    apellido_db: str = "Apellido",
+    nombres_api: str = "nombres",
+    paterno_api: str = "apellidoPaterno",
+    materno_api: str = "apellidoMaterno",
+    umbral_nombre: float = UMBRAL,
+    umbral_apellido: float = UMBRAL,
+) -> pd.DataFrame:
+    """Compara nombres y apellidos de la base con los de la API para todo el DataFrame.
+
+    Devuelve un DataFrame con el mismo índice y las columnas ``score_nombre``,
+    ``score_apellido``, ``coincide_nombre``, ``coincide_apellido`` y ``coincidencia``
+    (texto "Coincide"/"No coincide" como en el notebook, para nombre y apellido).
+    """
+    apellidos_api = df[paterno_api].fillna("").astype(str) + " " + df[materno_api].fillna("").astype(str)
+
+    score_nombre = similitud(normalizar(df[nombre_db]), normalizar(df[nombres_api]))
+    score_apellido = similitud(normalizar(df[apellido_db]), normalizar(apellidos_api))
+
+    resultado = pd.DataFrame({
+        "score_nombre": score_nombre.round(3),
+        "score_apellido": score_apellido.round(3),
+        "coincide_nombre": score_nombre >= umbral_nombre,
+        "coincide_apellido": score_apellido >= umbral_apellido,
+    }, index=df.index)
+    etiqueta_nombre = np.where(resultado["coincide_nombre"], "Coincide", "No coincide")
+    etiqueta_apellido = np.where(resultado["coincide_apellido"], "Coincide", "No coincide")
+    resultado["coincidencia"] = pd.Series(etiqueta_nombre, index=df.index) + ", " + etiqueta_apellido
+    return resultado
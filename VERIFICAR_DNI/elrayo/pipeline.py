@@ -0,0 +1,161 @@
+"""Verificación de DNIs de la base contra la API, en etapas reanudables.
+
+Reemplaza el bucle del notebook ``ordenar_datos.ipynb``. Las etapas son:
+
+1. cargar: lee la base original
+2. normalizar: DNI como texto, ceros iniciales (zfill) y marca de los DNIs que no se consultan
+3. consultar: consulta la API solo para los DNIs que aún no tienen respuesta guardada
+4. comparar: compara nombres y apellidos de la base con los de la API
+5. exportar: genera el Excel final con las mismas columnas que el notebook
+
+Las respuestas de la API se guardan en la carpeta de trabajo a medida que llegan, así que si
+el proceso se corta, la siguiente ejecución solo consulta los DNIs que faltan. Las demás
+etapas se recalculan en cada ejecución: la lectura de la base usa la copia en Parquet de
+``excel_cache`` y normalizar y comparar son operaciones por columnas que tardan segundos.
+
+Uso (desde la carpeta VERIFICAR_DNI):
+    python -m elrayo.pipeline --base elrayo/data/db_original/Base_Etna_2.12.24-1.xlsx --hoja Base_Etna_2.12
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+import pandas as pd
+
+from api_conection.async_conection import AsyncApisNetPe
+from api_conection.batch import run_batch_series
+from api_conection.conection import STATUS_NO_ENCONTRADO, STATUS_OK
+from api_conection.query import cargar_tokens
+from .excel_cache import leer_excel
+from .matching import comparar_nombres
+
+COLUMNAS_COINCIDENCIA = ["coincidencia_8_digitos", "coincidencia_7_digitos", "coincidencia_6_digitos", "coincidencia_5_digitos"]
+COLUMNAS_SALIDA = [
+    "DNI", "nombre_db", "nombre_corroborado_api", "apellido_db", "apellido_corroborado_api",
+    *COLUMNAS_COINCIDENCIA, "observaciones", "score_nombre", "score_apellido",
+]
+
+
+class Pipeline:
+    def __init__(self, base: str, hoja, trabajo: str, salida: str, concurrencia: int = 20) -> None:
+        self.base = base
+        self.hoja = hoja
+        self.trabajo = trabajo
+        self.salida = salida
+        self.concurrencia = concurrencia
+        os.makedirs(trabajo, exist_ok=True)
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self.trabajo, nombre)
+
+    # Paso 1: Cargar la base de datos original
+    def cargar(self) -> pd.DataFrame:
+        return leer_excel(self.base, sheet_name=self.hoja, dtype={"DNI": str})
+
+    # Paso 2: Normalizar los DNIs
+    def normalizar(self, df: pd.DataFrame) -> pd.DataFrame:
+        dni = df["DNI"].fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+        normalizado = pd.DataFrame({
+            "DNI": dni,
+            "digitos_dni": dni.str.len(),
+            "dni_consulta": dni.str.zfill(8),  # Agregar ceros iniciales para consultar la API
+            "nombre_db": df["Nombre"].fillna("").astype(str),
+            "apellido_db": df["Apellido"].fillna("").astype(str),
+        }, index=df.index)
+        # Validar DNIs vacíos o con más de 8 dígitos: no se consultan
+        normalizado["consultar"] = (normalizado["digitos_dni"] <= 8) & (dni != "")
+        return normalizado
+
+    # Paso 3: Consultar la API (incremental)
+    def consultar(self, normalizado: pd.DataFrame) -> pd.DataFrame:
+        ruta = self._ruta("consultas.csv")
+        numeros = normalizado.loc[normalizado["consultar"], "dni_consulta"]
+
+        async def ejecutar():
+            async with AsyncApisNetPe(cargar_tokens(), concurrency=self.concurrencia) as cliente:
+                return await run_batch_series(cliente, numeros, ruta, tipo="dni")
+
+        nuevos = asyncio.run(ejecutar())
+        logging.info(f"{nuevos} DNIs consultados en esta ejecución")
+
+        if not os.path.exists(ruta):
+            return pd.DataFrame(columns=["numero", "status", "nombres", "apellidoPaterno", "apellidoMaterno"])
+        # La respuesta es la misma para todas las filas con el mismo DNI
+        consultas = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+        return consultas.drop_duplicates("numero", keep="last")
+
+    # Paso 4: Comparar nombres y apellidos
+    def comparar(self, normalizado: pd.DataFrame, consultas: pd.DataFrame) -> pd.DataFrame:
+        # ``consultas`` tiene un registro por DNI, así que el merge conserva las filas y su orden
+        df = normalizado.merge(consultas, how="left", left_on="dni_consulta", right_on="numero")
+        df.index = normalizado.index
+        encontrado = df["status"] == STATUS_OK
+        no_encontrado = df["status"] == STATUS_NO_ENCONTRADO
+        pendiente = df["consultar"] & ~encontrado & ~no_encontrado
+
+        # Sin respuesta de la API se comparan los datos de la base consigo mismos, como en el notebook
+        df["nombre_corroborado_api"] = df["nombres"].where(encontrado, df["nombre_db"])
+        df["apellido_corroborado_api"] = (
+            df["apellidoPaterno"].fillna("") + " " + df["apellidoMaterno"].fillna("")
+        ).where(encontrado, df["apellido_db"])
+
+        df["observaciones"] = "-"
+        df.loc[no_encontrado, "observaciones"] = "No se encontró información sobre el DNI"
+        df.loc[pendiente, "observaciones"] = "Error al consultar la API"
+        df.loc[df["digitos_dni"] > 8, "observaciones"] = "Más de 8 dígitos"
+        df.loc[df["DNI"] == "", "observaciones"] = "DNI vacío"
+
+        scores = comparar_nombres(
+            pd.DataFrame({
+                "Nombre": df["nombre_db"],
+                "Apellido": df["apellido_db"],
+                "nombres": df["nombre_corroborado_api"],
+                "apellidoPaterno": df["apellido_corroborado_api"],
+                "apellidoMaterno": "",
+            }, index=df.index)
+        )
+        df["score_nombre"] = scores["score_nombre"]
+        df["score_apellido"] = scores["score_apellido"]
+
+        # La coincidencia va en la columna según la cantidad de dígitos reales del DNI
+        for columna in COLUMNAS_COINCIDENCIA:
+            df[columna] = "-"
+        for digitos in (8, 7, 6, 5):
+            filas = df["consultar"] & (df["digitos_dni"] == digitos)
+            df.loc[filas, f"coincidencia_{digitos}_digitos"] = scores.loc[filas, "coincidencia"]
+        df.loc[~df["consultar"], ["nombre_corroborado_api", "apellido_corroborado_api"]] = "-"
+        df.loc[~df["consultar"], ["score_nombre", "score_apellido"]] = float("nan")
+        return df
+
+    # Paso 5: Exportar el DataFrame final a un archivo Excel
+    def exportar(self, df: pd.DataFrame) -> None:
+        os.makedirs(os.path.dirname(self.salida) or ".", exist_ok=True)
+        df[COLUMNAS_SALIDA].to_excel(self.salida, index=False)
+        print(f"Archivo final exportado a {self.salida}")
+
+    def run(self) -> pd.DataFrame:
+        normalizado = self.normalizar(self.cargar())
+        consultas = self.consultar(normalizado)
+        resultado = self.comparar(normalizado, consultas)
+        self.exportar(resultado)
+        pendientes = (resultado["observaciones"] == "Error al consultar la API").sum()
+        if pendientes:
+            print(f"{pendientes} filas quedaron sin respuesta de la API; vuelva a ejecutar para completarlas")
+        return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación de DNIs de la base contra la API")
+    parser.add_argument("--base", default="elrayo/data/db_original/Base_Etna_2.12.24-1.xlsx")
+    parser.add_argument("--hoja", default="Base_Etna_2.12")
+    parser.add_argument("--trabajo", default="elrayo/data/pipeline", help="Carpeta de resultados intermedios")
+    parser.add_argument("--salida", default="elrayo/data/db_pruebas/db_corroborado.xlsx")
+    parser.add_argument("--concurrencia", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        Pipeline(args.base, args.hoja, args.trabajo, args.salida, args.concurrencia).run()
+    except KeyboardInterrupt:
+        print("Proceso interrumpido. Las consultas hechas quedaron guardadas; vuelva a ejecutar para continuar.")
@@ -0,0 +1,175 @@
+"""Renombrado masivo de las imágenes de documentos en dos fases: plan y aplicación.
+
+El plan calcula en memoria el nombre final de todos los archivos ("NOMBRE APELLIDO.ext",
+con sufijo " (n)" si se repite) usando un diccionario de contadores, sin consultar el disco
+por cada intento. El plan se guarda en un journal (JSON por línea) y luego se aplica en
+una sola pasada, registrando cada renombrado hecho. Con el journal se puede reanudar una
+aplicación interrumpida o revertirla.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+import pandas as pd
+
+JOURNAL = ".renombrado.journal"
+
+# Cada cuántos renombrados se fuerza el journal a disco
+FSYNC_CADA = 100
+
+
+def planificar(df: pd.DataFrame, disponibles: Set[str], existentes: Iterable[str]) -> List[dict]:
+    """Calcula los renombrados sin tocar el disco.
+
+    ``disponibles`` son los archivos que estarán en la carpeta destino para renombrar y
+    ``existentes`` todos los nombres que ya ocupan la carpeta (incluidos los disponibles).
+    Devuelve una lista de {"index", "origen", "destino"}; ``index`` es la fila del DataFrame.
+    """
+    # Las comparaciones ignoran mayúsculas: en Windows "juan.jpg" y "JUAN.jpg" son el mismo archivo
+    ocupados = {nombre.casefold() for nombre in existentes}
+    # Las filas del Excel se comparan con los archivos con normcase, igual que al indexar la carpeta
+    por_clave = {os.path.normcase(archivo): archivo for archivo in disponibles}
+    contadores: Dict[str, int] = {}
+    usados = set()
+    plan = []
+
+    for index, archivo, nombre, apellido in zip(
+        df.index,
+        df["Imagen Documento"].map(lambda a: str(a).replace("etna/", "").strip()),
+        df["Nombre"].astype(str).str.strip(),
+        df["Apellido"].astype(str).str.strip(),
+    ):
+        # Si dos filas apuntan al mismo archivo, solo la primera lo renombra
+        clave_archivo = os.path.normcase(archivo)
+        if clave_archivo not in por_clave or clave_archivo in usados:
+            continue
+        usados.add(clave_archivo)
+        archivo = por_clave[clave_archivo]
+
+        _, extension = os.path.splitext(archivo)
+        base = f"{nombre} {apellido}"
+        clave = f"{base}{extension}".casefold()
+        nuevo_nombre = f"{base}{extension}"
+        if clave in ocupados:
+            # Se continúa desde el último sufijo usado para este nombre en lugar de probar desde 1
+            contador = contadores.get(clave, 1)
+            while f"{base} ({contador}){extension}".casefold() in ocupados:
+                contador += 1
+            contadores[clave] = contador + 1
+            nuevo_nombre = f"{base} ({contador}){extension}"
+        ocupados.add(nuevo_nombre.casefold())
+        plan.append({"index": index, "origen": archivo, "destino": nuevo_nombre})
+    return plan
+
+
+def imprimir_plan(plan: List[dict]) -> None:
+    for paso in plan:
+        print(f"{paso['origen']} -> {paso['destino']}")
+    print(f"{len(plan)} archivos por renombrar")
+
+
+def _json_index(index):
+    # Los índices de pandas pueden ser numpy.int64, que json no serializa
+    return index.item() if hasattr(index, "item") else index
+
+
+def escribir_journal(plan: List[dict], carpeta: str, journal_path: Optional[str] = None) -> str:
+    journal_path = journal_path or os.path.join(carpeta, JOURNAL)
+    with open(journal_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "inicio", "carpeta": os.path.abspath(carpeta)}) + "\n")
+        for i, paso in enumerate(plan):
+            f.write(json.dumps({"op": "plan", "i": i, **paso, "index": _json_index(paso["index"])}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return journal_path
+
+
+def cargar_journal(journal_path: str):
+    """Devuelve (carpeta, plan, hechos): el plan guardado y los pasos ya aplicados"""
+    carpeta, plan, hechos = None, [], set()
+    with open(journal_path, encoding="utf-8") as f:
+        for linea in f:
+            if not linea.endswith("\n"):
+                break  # Línea incompleta por un corte a mitad de escritura
+            registro = json.loads(linea)
+            if registro["op"] == "inicio":
+                carpeta = registro["carpeta"]
+            elif registro["op"] == "plan":
+                plan.append(registro)
+            elif registro["op"] == "hecho":
+                hechos.add(registro["i"])
+            elif registro["op"] == "deshecho":
+                hechos.discard(registro["i"])
+    return carpeta, plan, hechos
+
+
+def journal_incompleto(journal_path: str) -> bool:
+    """True si el journal tiene un renombrado a medias: pasos del plan que nunca se aplicaron
+    ni se deshicieron, o una reversión que quedó sin terminar"""
+    if not os.path.exists(journal_path):
+        return False
+    carpeta, plan, hechos = cargar_journal(journal_path)
+    deshechos = set()
+    with open(journal_path, encoding="utf-8") as f:
+        for linea in f:
+            if not linea.endswith("\n"):
+                break
+            registro = json.loads(linea)
+            if registro["op"] == "deshecho":
+                deshechos.add(registro["i"])
+    sin_aplicar = any(paso["i"] not in hechos and paso["i"] not in deshechos for paso in plan)
+    return sin_aplicar or bool(deshechos and hechos)
+
+
+def _registrar(f, op: str, i: int, pendientes_fsync: int) -> int:
+    f.write(json.dumps({"op": op, "i": i}) + "\n")
+    f.flush()
+    pendientes_fsync += 1
+    if pendientes_fsync >= FSYNC_CADA:
+        os.fsync(f.fileno())
+        pendientes_fsync = 0
+    return pendientes_fsync
+
+
+def aplicar(journal_path: str) -> List[dict]:
+    """Aplica (o reanuda) los renombrados del journal y devuelve los pasos aplicados"""
+    carpeta, plan, hechos = cargar_journal(journal_path)
+    aplicados = []
+    pendientes_fsync = 0
+    with open(journal_path, "a", encoding="utf-8") as f:
+        for paso in plan:
+            origen = os.path.join(carpeta, paso["origen"])
+            destino = os.path.join(carpeta, paso["destino"])
+            if paso["i"] not in hechos:
+                if not os.path.exists(origen) and os.path.exists(destino):
+                    # Se renombró pero el corte ocurrió antes de registrarlo
+                    pass
+                elif os.path.exists(destino):
+                    raise FileExistsError(f"El destino ya existe, no se sobrescribe: {destino}")
+                else:
+                    os.rename(origen, destino)
+                    print(f"Archivo renombrado: {paso['origen']} -> {paso['destino']}")
+                pendientes_fsync = _registrar(f, "hecho", paso["i"], pendientes_fsync)
+            aplicados.append(paso)
+        os.fsync(f.fileno())
+    return aplicados
+
+
+def revertir(journal_path: str) -> int:
+    """Deshace en orden inverso los renombrados aplicados; devuelve cuántos se revirtieron"""
+    carpeta, plan, hechos = cargar_journal(journal_path)
+    revertidos = 0
+    pendientes_fsync = 0
+    with open(journal_path, "a", encoding="utf-8") as f:
+        for paso in reversed(plan):
+            if paso["i"] not in hechos:
+                continue
+            origen = os.path.join(carpeta, paso["origen"])
+            destino = os.path.join(carpeta, paso["destino"])
+            if os.path.exists(destino) and not os.path.exists(origen):
+                os.rename(destino, origen)
+                print(f"Renombrado revertido: {paso['destino']} -> {paso['origen']}")
+                revertidos += 1
+            pendientes_fsync = _registrar(f, "deshecho", paso["i"], pendientes_fsync)
+        os.fsync(f.fileno())
+    return revertidos
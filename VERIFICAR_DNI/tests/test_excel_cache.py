@@ -0,0 +1,23 @@
+import os
+
+import pandas as pd
+
+from elrayo.excel_cache import CARPETA_CACHE, leer_excel
+
+
+def test_columna_mezclada_se_guarda_en_parquet(tmp_path):
+    # DNIs escritos a veces como número y a veces como texto, con una celda vacía
+    libro = tmp_path / "base.xlsx"
+    pd.DataFrame({
+        "DNI": [12345678, "0012345", None, "ABC"],
+        "Nombre": ["A", "B", "C", "D"],
+    }).to_excel(libro, sheet_name="h", index=False)
+
+    primera = leer_excel(str(libro), sheet_name="h")
+    cache = tmp_path / CARPETA_CACHE
+    assert any(nombre.endswith(".parquet") for nombre in os.listdir(cache))
+
+    segunda = leer_excel(str(libro), sheet_name="h")
+    pd.testing.assert_frame_equal(primera, segunda)
+    assert list(segunda["DNI"].dropna()) == ["12345678", "0012345", "ABC"]
+    assert segunda["DNI"].isna().tolist() == [False, False, True, False]